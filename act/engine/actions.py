@@ -36,19 +36,30 @@ class Action(object):
     def get_limit(self):
         return self.limit
 
-    def filter_items(self, items):
+    def filter_items(self, world, item_type):
+        # returns ids of world items of the specified type usable by action
         pass
 
-    def reserve_items(self, items):
+    def choose_item(self, world, item_type):
+        # returns random world item of the specified type usable by action
         pass
 
-    def release_items(self, items):
+    def reserve_items(self, world, items):
+        pass
+
+    def release_items(self, world, items):
         pass
 
     def do_action(self, items, task_id):
         return operations.Operation(task_id)
 
+    def make_operation(self, items, action_result, task_id):
+        # converts result of act() into operation on the world
+        return operations.Operation(task_id)
+
     def act(self, items):
+        # may also be defined as a coroutine: asyncio worker awaits it
+        # concurrently with other tasks, other modes run it one at a time
         raise NotImplementedError()
 
     def __repr__(self):
@@ -57,52 +68,60 @@ class Action(object):
 
 class ReadLockAction(Action):
 
-    def filter_items(self, items):
-        for item in items:
-            if item.can_be_taken():
-                yield item
+    def filter_items(self, world, item_type):
+        return world.get_takeable_ids(item_type)
+
+    def choose_item(self, world, item_type):
+        return world.choose_takeable(item_type)
 
-    def reserve_items(self, items):
+    def reserve_items(self, world, items):
         for item in items:
-            item.take()
+            world.take(item)
 
-    def release_items(self, items):
+    def release_items(self, world, items):
         for item in items:
-            item.free()
+            world.free(item)
 
 
 class CreateAction(ReadLockAction):
     weight = 0.9
 
     def do_action(self, items, task_id):
-        action_result = self.act(items)
+        return self.make_operation(items, self.act(items), task_id)
+
+    def make_operation(self, items, action_result, task_id):
         return operations.CreateOperation(
-            item=action_result, dependencies=items, task_id=task_id)
+            item=action_result, dependencies=[i.id for i in items],
+            task_id=task_id)
 
 
 class BatchCreateAction(ReadLockAction):
     weight = 0.9
 
     def do_action(self, items, task_id):
-        new_items = self.act(items)
+        return self.make_operation(items, self.act(items), task_id)
+
+    def make_operation(self, items, action_result, task_id):
         return operations.BatchCreateOperation(
-            new_items=new_items, dependencies=items, task_id=task_id)
+            new_items=action_result, dependencies=[i.id for i in items],
+            task_id=task_id)
 
 
 class WriteLockAction(Action):
 
-    def filter_items(self, items):
-        for item in items:
-            if item.can_be_locked():
-                yield item
+    def filter_items(self, world, item_type):
+        return world.get_lockable_ids(item_type)
 
-    def reserve_items(self, items):
+    def choose_item(self, world, item_type):
+        return world.choose_lockable(item_type)
+
+    def reserve_items(self, world, items):
         for item in items:
-            item.lock()
+            world.lock(item)
 
-    def release_items(self, items):
+    def release_items(self, world, items):
         for item in items:
-            item.unlock()
+            world.unlock(item)
 
 
 class DeleteAction(WriteLockAction):
@@ -110,8 +129,11 @@ class DeleteAction(WriteLockAction):
 
     def do_action(self, items, task_id):
         assert len(items) == 1
-        self.act(items)
-        return operations.DeleteOperation(item=items[0], task_id=task_id)
+        return self.make_operation(items, self.act(items), task_id)
+
+    def make_operation(self, items, action_result, task_id):
+        return operations.DeleteOperation(item_id=items[0].id,
+                                          task_id=task_id)
 
 
 class IdempotantAction(ReadLockAction):
@@ -0,0 +1,145 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import concurrent.futures
+import signal
+import time
+import traceback
+
+from oslo_log import log as logging
+import rq
+
+from act.engine import core
+from act.engine import serialization
+
+LOG = logging.getLogger(__name__)
+
+DEQUEUE_TIMEOUT = 1  # seconds, how often the worker checks for shutdown
+
+
+class AsyncWorker(object):
+    """Runs many actions concurrently in a single process.
+
+    Actions that define act() as a coroutine are awaited in the event
+    loop, regular actions are run in a bounded pool of threads.
+    """
+
+    def __init__(self, queue, concurrency, threads, job_counters=None,
+                 slot=None):
+        self.queue = queue
+        self.redis_connection = queue.connection
+        self.concurrency = concurrency
+        # runs synchronous actions
+        self.executor = concurrent.futures.ThreadPoolExecutor(threads)
+        # waits for new jobs, separated so busy actions cannot block it
+        self.dequeue_executor = concurrent.futures.ThreadPoolExecutor(1)
+        self.job_counters = job_counters
+        self.slot = slot
+        self.running = False
+
+    def dequeue(self):
+        try:
+            reply = rq.Queue.dequeue_any([self.queue], DEQUEUE_TIMEOUT,
+                                         connection=self.redis_connection)
+        except rq.exceptions.DequeueTimeout:
+            return None
+        return reply[0] if reply else None
+
+    def fail(self, job, exc_string):
+        # the engine reads failed jobs from the registry of the task queue,
+        # status and the registry are updated together as rq worker does
+        with self.redis_connection.pipeline() as pipe:
+            job.set_status(rq.job.JobStatus.FAILED, pipeline=pipe)
+            self.queue.failed_job_registry.add(job, ttl=job.failure_ttl,
+                                               exc_string=exc_string,
+                                               pipeline=pipe)
+            pipe.execute()
+
+    async def run_action(self, action, items, task_id):
+        if asyncio.iscoroutinefunction(action.act):
+            started = time.time()
+            action_result = await action.act(items)
+            operation = action.make_operation(items, action_result, task_id)
+            operation.duration = time.time() - started
+            return operation
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, core.run_action,
+                                          action, items, task_id)
+
+    async def perform(self, job):
+        try:
+            data, serializer_name = job.args
+            serializer = serialization.get_serializer(serializer_name)
+            task_id, action, items = core.load_task(data, serializer)
+            LOG.info('Executing action %s, task: %s, items: %s',
+                     action, task_id, items)
+
+            timeout = job.timeout if job.timeout and job.timeout > 0 else None
+            operation = await asyncio.wait_for(
+                self.run_action(action, items, task_id), timeout)
+
+            LOG.info('Operation %s', operation)
+            core.notify_completion(operation, serializer,
+                                   self.redis_connection)
+            job.delete()
+        except Exception:
+            LOG.exception('Job %s failed', job.id)
+            self.fail(job, traceback.format_exc())
+
+        if self.job_counters is not None:
+            self.job_counters[self.slot] += 1
+
+    async def work(self):
+        loop = asyncio.get_event_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        self.running = True
+
+        while self.running:
+            await semaphore.acquire()
+            job = await loop.run_in_executor(self.dequeue_executor,
+                                             self.dequeue)
+            if job is None:
+                semaphore.release()
+                continue
+
+            task = loop.create_task(self.perform(job))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda t: semaphore.release())
+
+        LOG.info('Waiting for %s running jobs', len(tasks))
+        if tasks:
+            await asyncio.wait(tasks)
+        self.executor.shutdown()
+        self.dequeue_executor.shutdown()
+
+    def stop(self):
+        LOG.info('Shutting down asyncio worker')
+        self.running = False
+
+
+def work(queue, concurrency, threads, job_counters=None, slot=None):
+    worker = AsyncWorker(queue, concurrency, threads, job_counters, slot)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, worker.stop)
+
+    try:
+        loop.run_until_complete(worker.work())
+    finally:
+        loop.close()
@@ -103,15 +103,127 @@ SCENARIO_OPTS = [
 
 INTERVAL_OPTS = [
     cfg.FloatOpt('interval', default=utils.env('ACT_INTERVAL') or 0.5,
-                 help='Polling interval in seconds. Defaults to '
-                      'env[ACT_INTERVAL] or 0.5'),
+                 help='Polling interval in seconds. The engine does not '
+                      'wait the whole interval, it wakes up as soon as '
+                      'any task completes. Defaults to env[ACT_INTERVAL] '
+                      'or 0.5'),
 ]
 
-ENGINE_OPTS = REDIS_OPTS + INTERVAL_OPTS + OPENSTACK_OPTS + SCENARIO_OPTS
-WORKER_OPTS = REDIS_OPTS
+METRICS_OPTS = [
+    cfg.FloatOpt('metrics-flush-interval',
+                 default=utils.env('ACT_METRICS_FLUSH_INTERVAL') or 0,
+                 help='Minimum time in seconds between writes of engine '
+                      'metrics into Redis. By default metrics are written '
+                      'once per engine iteration. Defaults to '
+                      'env[ACT_METRICS_FLUSH_INTERVAL] or 0'),
+    cfg.StrOpt('metrics-out',
+               default=utils.env('ACT_METRICS_OUT'),
+               help='File to append samples of all metrics, records of '
+                    'completed tasks and stage boundaries to. Written as '
+                    'CSV if the name ends with .csv, as JSON lines '
+                    'otherwise. Defaults to env[ACT_METRICS_OUT]'),
+]
+
+SERIALIZER_OPTS = [
+    cfg.StrOpt('serializer',
+               default=utils.env('ACT_SERIALIZER') or 'pickle',
+               choices=['pickle', 'msgpack'],
+               help='Format of tasks and operations passed between the '
+                    'engine and workers. msgpack is more compact and faster, '
+                    'but requires payloads of items to contain only basic '
+                    'types. Defaults to env[ACT_SERIALIZER] or pickle'),
+]
+
+PROFILE_OPTS = [
+    cfg.StrOpt('profile',
+               default=utils.env('ACT_PROFILE'),
+               help='Profile the engine and write cProfile stats into the '
+                    'specified file, they can be viewed with pstats. '
+                    'Defaults to env[ACT_PROFILE]'),
+]
+
+SNAPSHOT_OPTS = [
+    cfg.StrOpt('snapshot',
+               default=utils.env('ACT_SNAPSHOT'),
+               help='File to periodically save the world and the progress '
+                    'of the scenario into, the run can be continued from '
+                    'it with --resume. Periodic snapshots are written by a '
+                    'forked process, so the engine is not blocked. '
+                    'Defaults to env[ACT_SNAPSHOT]'),
+    cfg.FloatOpt('snapshot-interval',
+                 default=utils.env('ACT_SNAPSHOT_INTERVAL') or 60,
+                 help='Interval in seconds between snapshots. Defaults to '
+                      'env[ACT_SNAPSHOT_INTERVAL] or 60'),
+    cfg.StrOpt('resume',
+               default=utils.env('ACT_RESUME'),
+               help='Snapshot file to load the world from and to continue '
+                    'the scenario at the stage where the snapshot was '
+                    'taken. Defaults to env[ACT_RESUME]'),
+]
+
+PROMETHEUS_OPTS = [
+    cfg.IntOpt('prometheus-port',
+               default=utils.env('ACT_PROMETHEUS_PORT'),
+               help='Serve metrics in Prometheus text format at '
+                    'http://<host>:<port>/metrics. Defaults to '
+                    'env[ACT_PROMETHEUS_PORT], not served if not set'),
+]
+
+EXECUTOR_OPTS = [
+    cfg.StrOpt('executor',
+               default=utils.env('ACT_EXECUTOR') or 'rq',
+               choices=['rq', 'thread', 'process'],
+               help='Where tasks are executed: "rq" sends them to '
+                    'act-worker processes via Redis, "thread" and '
+                    '"process" run them inside the engine using a pool of '
+                    'threads or processes, Redis is not needed then and '
+                    'metrics are written to the log at the end. Defaults to '
+                    'env[ACT_EXECUTOR] or rq'),
+    cfg.IntOpt('executor-workers',
+               default=utils.env('ACT_EXECUTOR_WORKERS') or 10,
+               help='Number of threads or processes used by "thread" and '
+                    '"process" executors. Defaults to '
+                    'env[ACT_EXECUTOR_WORKERS] or 10'),
+]
+
+WORKER_MODE_OPTS = [
+    cfg.StrOpt('mode',
+               default=utils.env('ACT_WORKER_MODE') or 'fork',
+               choices=['fork', 'inprocess', 'asyncio'],
+               help='How worker executes tasks: "fork" runs every task in '
+                    'a forked child process, "inprocess" runs tasks in the '
+                    'worker process itself keeping clients and connections '
+                    'warm between tasks, "asyncio" runs many tasks '
+                    'concurrently in one process. '
+                    'Defaults to env[ACT_WORKER_MODE] or fork'),
+    cfg.IntOpt('processes',
+               default=utils.env('ACT_WORKER_PROCESSES') or 1,
+               help='Number of worker processes. If more than 1, then the '
+                    'worker forks a supervised pool of processes sharing '
+                    'pre-loaded actions. Defaults to '
+                    'env[ACT_WORKER_PROCESSES] or 1'),
+    cfg.IntOpt('async-concurrency',
+               default=utils.env('ACT_ASYNC_CONCURRENCY') or 100,
+               help='Max number of tasks run concurrently by asyncio '
+                    'worker. Defaults to env[ACT_ASYNC_CONCURRENCY] or 100'),
+    cfg.IntOpt('async-threads',
+               default=utils.env('ACT_ASYNC_THREADS') or 20,
+               help='Number of threads used by asyncio worker to run '
+                    'actions that are not coroutines. Defaults to '
+                    'env[ACT_ASYNC_THREADS] or 20'),
+]
+
+ENGINE_OPTS = (REDIS_OPTS + INTERVAL_OPTS + OPENSTACK_OPTS + SCENARIO_OPTS +
+               METRICS_OPTS + SERIALIZER_OPTS + EXECUTOR_OPTS + PROFILE_OPTS +
+               PROMETHEUS_OPTS + SNAPSHOT_OPTS)
+WORKER_OPTS = (REDIS_OPTS + OPENSTACK_OPTS + WORKER_MODE_OPTS +
+               PROMETHEUS_OPTS)
 MONITOR_OPTS = REDIS_OPTS + INTERVAL_OPTS
 
 
 def list_opts():
-    all_opts = (REDIS_OPTS + OPENSTACK_OPTS + SCENARIO_OPTS + INTERVAL_OPTS)
+    all_opts = (REDIS_OPTS + OPENSTACK_OPTS + SCENARIO_OPTS + INTERVAL_OPTS +
+                METRICS_OPTS + SERIALIZER_OPTS + EXECUTOR_OPTS +
+                PROFILE_OPTS + PROMETHEUS_OPTS + SNAPSHOT_OPTS +
+                WORKER_MODE_OPTS)
     yield (None, copy.deepcopy(all_opts))
@@ -12,4 +12,4 @@
 # limitations under the License.
 
 TASK_QUEUE_NAME = 'act_tasks'
-FAILURE_QUEUE_NAME = 'failed'  # rq default queue name for failures
+COMPLETION_LIST_NAME = 'act_completions'  # operations pushed by workers
@@ -11,8 +11,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import collections
-import random
+from concurrent import futures
+import queue
 import re
 import time
 
@@ -21,9 +23,14 @@ from oslo_utils import timeutils
 import rq
 
 from act.engine import consts
+from act.engine import export
+from act.engine import histogram as histogram_pkg
 from act.engine import item as item_pkg
 from act.engine import metrics
+from act.engine import readiness as readiness_pkg
 from act.engine import registry
+from act.engine import serialization
+from act.engine import snapshot
 from act.engine import utils
 from act.engine import world as world_pkg
 
@@ -34,68 +41,301 @@ Task = collections.namedtuple('Task', ['id', 'action', 'items'])
 NoOpTask = Task(id=0, action=None, items=None)
 
 
-def produce_task(world, actions):
+def produce_tasks(world, actions, n, readiness, limits=None,
+                  actions_counter=None):
+    # produces up to n tasks, reserves their items in the world and
+    # counts them in actions_counter; actions that reach their limit
+    # are not chosen anymore
+    limits = limits or {}
+    if actions_counter is None:
+        actions_counter = collections.defaultdict(int)
 
-    available_action_items = {}  # action -> (items)
-    for action in actions:
-        item_types = action.get_depends_on()
-        world_items = world.filter_items(item_types)
-        filtered_items = list(action.filter_items(world_items))
-
-        if not filtered_items:
-            continue
-
-        # LOG.debug('Available action: %s, item-types: %s, filtered_items: %s',
-        #           action, item_types, filtered_items)
+    readiness.enable(apply_limits_filter(limits, actions, actions_counter))
+    tasks = []
 
-        # check that filtered_items contain items of *all* item_types
-        filtered_item_types = set(i.item_type for i in filtered_items)
-        if item_types and filtered_item_types != item_types:
-            continue
-
-        available_action_items[action] = filtered_items
-
-    if available_action_items:
-        available_actions = list(available_action_items.keys())
-        chosen_action = utils.weighted_random_choice(available_actions)
-        available_items = available_action_items[chosen_action]
+    for i in range(n):
+        chosen_action = readiness.choose()
+        if chosen_action is None:
+            LOG.debug('No actions available')
+            break
 
         # pick one random item per type
-        items_per_type = collections.defaultdict(list)
-        for item in available_items:
-            items_per_type[item.item_type].append(item)
-
-        chosen_items = [random.choice(v) for v in items_per_type.values()]
+        chosen_items = [chosen_action.choose_item(world, item_type)
+                        for item_type in chosen_action.get_depends_on() or ()]
 
-        chosen_action.reserve_items(chosen_items)
+        chosen_action.reserve_items(world, chosen_items)
 
         task = Task(id=utils.make_id(), action=chosen_action,
                     items=chosen_items)
         LOG.info('Produced task: %s', task)
-
-        return task
+        tasks.append(task)
+
+        action_name = str(chosen_action)
+        actions_counter[action_name] += 1
+        if (action_name in limits and
+                actions_counter[action_name] >= limits[action_name]):
+            readiness.disable(chosen_action)
+
+    return tasks
+
+
+def make_task_message(task):
+    # compact representation of the task sent to workers: action name,
+    # task id and type and payload of the chosen items
+    return (task.id, str(task.action),
+            [(i.id, i.item_type, i.payload) for i in task.items])
+
+
+def enqueue_tasks(task_queue, tasks, serializer):
+    # puts all tasks into the queue in a single Redis pipeline,
+    # the results are delivered via completion list, so rq need not keep them;
+    # jobs are named after tasks, so failed jobs identify failed tasks
+    task_queue.enqueue_many(
+        [task_queue.prepare_data(
+            do_action,
+            args=(serializer.dump_task(make_task_message(task)),
+                  serializer.name),
+            job_id=task.id, result_ttl=0)
+         for task in tasks])
+
+
+def notify_completion(operation, serializer, redis_connection=None):
+    # publishes the operation so that the engine does not need to poll jobs
+    redis_connection = (redis_connection or
+                        rq.connections.get_current_connection())
+    redis_connection.rpush(consts.COMPLETION_LIST_NAME,
+                           serializer.dump_operation(operation))
+
+
+def clear_completions():
+    # forget operations left from previous runs
+    redis_connection = rq.connections.get_current_connection()
+    redis_connection.delete(consts.COMPLETION_LIST_NAME)
+
+
+def harvest(failed_registry, serializer):
+    # collects operations of all completed tasks and the number of failed
+    # jobs in a single round trip to Redis
+    redis_connection = rq.connections.get_current_connection()
+    pipe = redis_connection.pipeline()
+    pipe.lrange(consts.COMPLETION_LIST_NAME, 0, -1)
+    pipe.delete(consts.COMPLETION_LIST_NAME)
+    pipe.zcard(failed_registry.key)
+    raw_operations, _, failures = pipe.execute()
+
+    return ([serializer.load_operation(raw) for raw in raw_operations],
+            failures)
+
+
+def wait_for_completion(timeout, serializer):
+    # blocks until some task completes or timeout expires,
+    # returns the list with the operation of completed task (if any)
+    if timeout <= 0:
+        return []
+
+    redis_connection = rq.connections.get_current_connection()
+    reply = redis_connection.blpop(consts.COMPLETION_LIST_NAME,
+                                   timeout=timeout)
+    if not reply:
+        return []
+    return [serializer.load_operation(reply[1])]
+
+
+def unpack_task(message):
+    # returns task id, action and items of the task message
+    task_id, action_name, raw_items = message
+    action = registry.get_action(action_name)
+    items = [item_pkg.Item(item_type, payload, item_id=item_id)
+             for item_id, item_type, payload in raw_items]
+    return task_id, action, items
+
+
+def load_task(data, serializer):
+    # decodes task message, returns task id, action and items
+    return unpack_task(serializer.load_task(data))
+
+
+def run_action(action, items, task_id):
+    # runs the action and records its duration in the operation;
+    # coroutine act() is run to completion in a loop of its own
+    started = time.time()
+    if asyncio.iscoroutinefunction(action.act):
+        loop = asyncio.new_event_loop()
+        try:
+            action_result = loop.run_until_complete(action.act(items))
+        finally:
+            loop.close()
+        operation = action.make_operation(items, action_result, task_id)
     else:
-        LOG.debug('No actions available')
-        return None
+        operation = action.do_action(items=items, task_id=task_id)
+    operation.duration = time.time() - started
+    return operation
 
 
-def handle_operation(op, world):
-    # handles a specific operation on the world
-    LOG.info('Handle: %s', op)
-    op.do(world)
+def execute_task(message):
+    # runs the task and returns the operation on the world
+    task_id, action, items = unpack_task(message)
+    LOG.info('Executing action %s, task: %s, items: %s',
+             action, task_id, items)
 
+    operation = run_action(action, items, task_id)
 
-def do_action(task):
-    # does real action inside worker processes
-    LOG.info('Executing action %s', task)
+    LOG.info('Operation %s', operation)
+    return operation
 
-    action = task.action
-    operation = action.do_action(items=task.items, task_id=task.id)
 
-    LOG.info('Operation %s', operation)
+def do_action(data, serializer_name):
+    # does real action inside worker processes
+    serializer = serialization.get_serializer(serializer_name)
+    operation = execute_task(serializer.load_task(data))
+    notify_completion(operation, serializer)
     return operation
 
 
+class Executor(object):
+    """Runs tasks produced by the engine and collects their operations.
+
+    The engine submits tasks, then periodically harvests operations of
+    completed tasks together with ids of failed tasks and waits for
+    completions in between.
+    """
+
+    def start(self):
+        pass
+
+    def submit(self, tasks):
+        raise NotImplementedError()
+
+    def harvest(self):
+        # returns operations of completed tasks and ids of tasks failed
+        # since the previous call
+        raise NotImplementedError()
+
+    def wait(self, timeout):
+        # blocks until some task completes or timeout expires,
+        # returns the list of operations of completed tasks (if any)
+        raise NotImplementedError()
+
+    def stop(self):
+        pass
+
+
+class RQExecutor(Executor):
+    """Sends tasks to act-worker processes via rq queue in Redis."""
+
+    def __init__(self, serializer_name='pickle'):
+        super(RQExecutor, self).__init__()
+        self.serializer = serialization.get_serializer(serializer_name)
+        self.task_queue = None
+        self.failed_registry = None
+        self.failures = 0  # size of the registry when last seen
+        self.failed_ids = set()  # ids of failed jobs already reported
+
+    def start(self):
+        self.task_queue = rq.Queue(consts.TASK_QUEUE_NAME)
+        # workers record failed jobs in the registry of the task queue;
+        # jobs left from previous runs are not reported
+        self.failed_registry = self.task_queue.failed_job_registry
+        self.failed_ids = set(self.failed_registry.get_job_ids())
+        self.failures = len(self.failed_ids)
+        clear_completions()
+
+    def submit(self, tasks):
+        enqueue_tasks(self.task_queue, tasks, self.serializer)
+
+    def harvest(self):
+        operations, failures = harvest(self.failed_registry, self.serializer)
+        if failures == self.failures:
+            return operations, []
+
+        # the registry changed, read ids of jobs only now
+        self.failures = failures
+        failed_ids = [job_id for job_id in self.failed_registry.get_job_ids()
+                      if job_id not in self.failed_ids]
+        self.failed_ids.update(failed_ids)
+        return operations, failed_ids
+
+    def wait(self, timeout):
+        return wait_for_completion(timeout, self.serializer)
+
+
+class LocalExecutor(Executor):
+    """Runs tasks inside the engine process, no Redis is required.
+
+    Tasks are run by a pool of threads or of forked processes.
+    """
+
+    def __init__(self, kind='thread', workers=10):
+        super(LocalExecutor, self).__init__()
+        self.kind = kind
+        self.workers = workers
+        self.pool = None
+        self.completed = queue.Queue()  # done futures
+        self.task_ids = {}  # future -> id of its task
+        self.failed_ids = []  # ids of failed tasks not yet harvested
+
+    def start(self):
+        if self.kind == 'process':
+            self.pool = futures.ProcessPoolExecutor(self.workers)
+        else:
+            self.pool = futures.ThreadPoolExecutor(self.workers)
+
+    def submit(self, tasks):
+        for task in tasks:
+            future = self.pool.submit(execute_task,
+                                      make_task_message(task))
+            self.task_ids[future] = task.id
+            future.add_done_callback(self.completed.put)
+
+    def _collect(self, future):
+        task_id = self.task_ids.pop(future)
+        exc = future.exception()
+        if exc is None:
+            return [future.result()]
+
+        LOG.error('Task %s failed: %s', task_id, exc)
+        self.failed_ids.append(task_id)
+        return []
+
+    def harvest(self):
+        operations = []
+        while True:
+            try:
+                future = self.completed.get_nowait()
+            except queue.Empty:
+                break
+            operations.extend(self._collect(future))
+
+        failed_ids, self.failed_ids = self.failed_ids, []
+        return operations, failed_ids
+
+    def wait(self, timeout):
+        if timeout <= 0:
+            return []
+        try:
+            future = self.completed.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        return self._collect(future)
+
+    def stop(self):
+        # waits for tasks that are still running
+        self.pool.shutdown()
+
+
+def publish_latency(metrics_buffer, name, histogram):
+    # publishes percentiles and max of durations in milliseconds
+    values = histogram.get_percentiles()
+    labels = ['p%d' % p for p in histogram_pkg.PERCENTILES]
+    values.append(histogram.max)
+    labels.append('max')
+
+    for label, value in zip(labels, values):
+        metrics_buffer.set_metric(metrics.METRIC_TYPE_LATENCY,
+                                  '%s.%s_ms' % (name, label),
+                                  round(value * 1000, 2))
+
+
 def apply_action_filter(action_filter):
     if not action_filter:
         for a in registry.get_actions():
@@ -116,17 +356,46 @@ def apply_limits_filter(limits, actions, actions_counter):
             yield action
 
 
-def process(scenario, interval):
-    # the entry-point to engine
+def make_snapshot_state(stage, stage_elapsed, actions_counter, pending,
+                        counter):
+    # progress of the scenario saved together with the world; tasks that
+    # are still pending are lost on resume, so they are not counted
+    actions = dict(actions_counter)
+    for task in pending.values():
+        actions[str(task.action)] -= 1
+    return dict(stage=stage, stage_elapsed=stage_elapsed, actions=actions,
+                operations=counter)
+
+
+def process(scenario, interval, metrics_flush_interval=0,
+            serializer_name='pickle', executor=None, metrics_sink=None,
+            recorder=None, metrics_listeners=(), snapshotter=None,
+            resume_from=None):
+    # the entry-point to engine; by default tasks are run by act-workers
+    # and metrics are stored in Redis; if recorder (export.RecordWriter)
+    # is given, then metric samples, tasks and stages are recorded in it;
+    # metrics listeners are called with every batch of metric updates;
+    # if snapshotter (snapshot.Snapshotter) is given, then the world is
+    # saved periodically and at the end, resume_from is a snapshot file
+    # to continue the scenario from
+    executor = executor or RQExecutor(serializer_name)
+    metrics_sink = metrics_sink or metrics.RedisSink()
+
     registry.init()
-    metrics.clear()
+    metrics_sink.clear()
 
     # initialize the world
-    default_items = [item_pkg.Item('root')]
+    if resume_from:
+        world, state = snapshot.load(resume_from)
+    else:
+        default_items = [item_pkg.Item('root')]
+
+        world = world_pkg.World()
+        for item in default_items:
+            world.put(item)
+        state = {}
 
-    world = world_pkg.World()
-    for item in default_items:
-        world.put(item)
+    readiness = readiness_pkg.ReadinessCache(world, registry.get_actions())
 
     # global section
     globals = scenario.get('global') or {}
@@ -145,20 +414,37 @@ def process(scenario, interval):
     # add tear down
     play.append(dict(concurrency=0, duration=1000, title='tear down'))
 
-    task_results = []
-    task_queue = rq.Queue(consts.TASK_QUEUE_NAME)
-    failed_queue = rq.Queue(consts.FAILURE_QUEUE_NAME)
-    failed_queue.empty()
-    metrics.set_metric(metrics.METRIC_TYPE_SUMMARY, 'failures', 0,
-                       mood=metrics.MOOD_HAPPY)
+    pending = {}  # task id -> task
+
+    metrics_buffer = metrics.MetricsBuffer(
+        flush_interval=metrics_flush_interval, sink=metrics_sink)
+    metrics_buffer.set_metric(metrics.METRIC_TYPE_SUMMARY, 'failures', 0,
+                              mood=metrics.MOOD_HAPPY)
+    if recorder:
+        metrics_buffer.add_listener(recorder.record_metrics)
+    for listener in metrics_listeners:
+        metrics_buffer.add_listener(listener)
+    tick_timer = metrics.TickTimer()
+    # action name -> histogram of durations reported by workers
+    action_latencies = collections.defaultdict(histogram_pkg.Histogram)
 
     failures = 0
-    counter = 0
-    actions_counter = collections.defaultdict(int)
+    counter = state.get('operations', 0)
+    actions_counter = collections.defaultdict(int, state.get('actions', {}))
+    start_stage = state.get('stage', 0)
+    executor.start()
+    operations = []
 
     for idx, stage in enumerate(play):
+        if idx < start_stage:
+            continue  # already played before the snapshot
+
         title = stage.get('title') or ('stage #%s' % idx)
         duration = stage['duration']
+        played = 0  # seconds of the stage played before the resume
+        if idx == start_stage:
+            played = min(duration, state.get('stage_elapsed', 0))
+            duration -= played
         concurrency = stage['concurrency']
 
         LOG.info('Playing stage "%s" duration: %s, concurrency: %s',
@@ -167,57 +453,132 @@ def process(scenario, interval):
         limits = stage.get('limits') or {}
         limits.update(global_limits)
 
+        stage_actions = list(apply_action_filter(stage.get('filter')))
+        stage_latency = histogram_pkg.Histogram()
+        updated_latencies = set()
+
         watch = timeutils.StopWatch(duration=duration)
         watch.start()
+        if recorder:
+            recorder.record(export.KIND_STAGE, title, 'start')
 
         while not watch.expired():
-
-            pending = []
-            for task_result in task_results:
-                operation = task_result.return_value
-
-                if operation is None:
-                    pending.append(task_result)
-                else:
-                    handle_operation(operation, world)
-
-                    counter += 1
-                    metrics.set_metric(metrics.METRIC_TYPE_SUMMARY,
-                                       'operation', counter)
-
+            tick_timer.start_tick()
+            task_records = []
+
+            harvested, failed_ids = executor.harvest()
+            operations.extend(harvested)
+            tick_timer.end_phase('harvest')
+
+            for task_id in failed_ids:
+                task = pending.pop(task_id, None)
+                if task is None:
+                    continue
+                # the task will not complete, give its items back
+                task.action.release_items(world, task.items)
+                failures += 1
+
+            completed = []
+            for operation in operations:
+                task = pending.pop(operation.task_id, None)
+                if task is None:
+                    LOG.warning('Operation of unknown task: %s', operation)
+                    continue
+
+                completed.append(operation)
+
+                if operation.duration is not None:
+                    action_name = str(task.action)
+                    action_latencies[action_name].record(operation.duration)
+                    stage_latency.record(operation.duration)
+                    updated_latencies.add(action_name)
+
+                if recorder:
+                    task_records.append(export.make_record(
+                        export.KIND_TASK, str(task.action),
+                        operation.duration, task.id))
+
+            if task_records:
+                recorder.write(task_records)
+
+            if completed:
+                world.apply_batch(completed)
+                counter += len(completed)
+
+            operations = []
+            tick_timer.end_phase('apply')
+
+            tasks = []
             addition = concurrency - len(pending)
             if addition > 0:  # need to add more tasks
-                for i in range(addition):
-                    actions = apply_action_filter(stage.get('filter'))
-                    actions = apply_limits_filter(limits, actions,
-                                                  actions_counter)
-                    next_task = produce_task(world, actions)
-                    if not next_task:
-                        break  # no more actions possible
-                    pending.append(task_queue.enqueue(do_action, next_task))
-                    actions_counter[str(next_task.action)] += 1
-
-            task_results = pending
-
-            if len(failed_queue) > failures:
-                failures = len(failed_queue)
-                metrics.set_metric(metrics.METRIC_TYPE_SUMMARY, 'failures',
-                                   failures, mood=metrics.MOOD_SAD)
-
-            metrics.set_metric(metrics.METRIC_TYPE_SUMMARY, 'backlog',
-                               len(task_results))
-
-            for action, counter in actions_counter.items():
-                metrics.set_metric(metrics.METRIC_TYPE_ACTIONS, action,
-                                   counter)
-
-            for item_type, counter in world.get_counters().items():
-                metrics.set_metric(metrics.METRIC_TYPE_OBJECTS, item_type,
-                                   counter)
-
-            if len(task_results) == 0:  # no existing tasks and no to add
+                tasks = produce_tasks(world, stage_actions, addition,
+                                      readiness, limits, actions_counter)
+                for task in tasks:
+                    pending[task.id] = task
+            tick_timer.end_phase('produce')
+
+            if tasks:
+                executor.submit(tasks)
+            tick_timer.end_phase('submit')
+
+            if snapshotter and snapshotter.is_due():
+                snapshotter.save(world, make_snapshot_state(
+                    idx, played + watch.elapsed(), actions_counter, pending,
+                    counter))
+                tick_timer.end_phase('snapshot')
+
+            if failed_ids:
+                metrics_buffer.set_metric(metrics.METRIC_TYPE_SUMMARY,
+                                          'failures', failures,
+                                          mood=metrics.MOOD_SAD)
+
+            metrics_buffer.set_metric(metrics.METRIC_TYPE_SUMMARY,
+                                      'operation', counter)
+            metrics_buffer.set_metric(metrics.METRIC_TYPE_SUMMARY, 'backlog',
+                                      len(pending))
+
+            for action, action_count in actions_counter.items():
+                metrics_buffer.set_metric(metrics.METRIC_TYPE_ACTIONS, action,
+                                          action_count)
+
+            for item_type, item_count in world.get_counters().items():
+                metrics_buffer.set_metric(metrics.METRIC_TYPE_OBJECTS,
+                                          item_type, item_count)
+
+            for action_name in updated_latencies:
+                publish_latency(metrics_buffer, 'latency.%s' % action_name,
+                                action_latencies[action_name])
+            if updated_latencies:
+                publish_latency(metrics_buffer, 'stage.%s' % title,
+                                stage_latency)
+                updated_latencies.clear()
+
+            # time of the metrics phase itself is reported on the next tick
+            for phase, average in tick_timer.get_averages().items():
+                metrics_buffer.set_metric(metrics.METRIC_TYPE_ENGINE,
+                                          'engine.%s_ms' % phase,
+                                          round(average, 2))
+
+            if metrics_buffer.flush():
+                tick_timer.reset()
+
+            tick_timer.end_phase('metrics')
+            tick_timer.end_tick()
+
+            if len(pending) == 0:  # no existing tasks and no to add
                 break  # tear down finished
 
-            time.sleep(interval)
+            # sleep until some task completes, but not longer than interval
+            operations = executor.wait(interval)
+
+        if recorder:
+            recorder.record(export.KIND_STAGE, title, 'end')
+
+    executor.stop()
+    metrics_buffer.flush(force=True)
+
+    if snapshotter:
+        snapshotter.save_now(world, make_snapshot_state(
+            len(play), 0, actions_counter, pending, counter))
 
     LOG.info('World: %s', world)
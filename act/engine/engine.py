@@ -11,30 +11,96 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import cProfile
+
 from oslo_config import cfg
 from oslo_log import log as logging
 import rq
 
 from act.engine import config
 from act.engine import core
+from act.engine import export
+from act.engine import metrics
+from act.engine import prometheus
+from act.engine import snapshot
 from act.engine import utils
 
 LOG = logging.getLogger(__name__)
 
 
-def run():
-    utils.init_config_and_logging(config.ENGINE_OPTS)
+def play_locally(scenario, recorder, metrics_listeners, snapshotter):
+    # everything runs inside the engine process, no Redis needed
+    executor = core.LocalExecutor(kind=cfg.CONF.executor,
+                                  workers=cfg.CONF.executor_workers)
+    metrics_sink = metrics.MemorySink()
+    core.process(scenario, cfg.CONF.interval,
+                 metrics_flush_interval=cfg.CONF.metrics_flush_interval,
+                 executor=executor, metrics_sink=metrics_sink,
+                 recorder=recorder, metrics_listeners=metrics_listeners,
+                 snapshotter=snapshotter, resume_from=cfg.CONF.resume)
+
+    for key, m in sorted(metrics_sink.get_all_metrics().items()):
+        LOG.info('Metric %s: %s', key, m.value)
+
 
+def play(scenario, recorder, metrics_listeners, snapshotter):
     redis_connection = utils.make_redis_connection(host=cfg.CONF.redis_host,
                                                    port=cfg.CONF.redis_port)
 
+    with rq.Connection(redis_connection):
+        LOG.info('Connected to Redis')
+        core.process(scenario, cfg.CONF.interval,
+                     metrics_flush_interval=cfg.CONF.metrics_flush_interval,
+                     serializer_name=cfg.CONF.serializer,
+                     recorder=recorder, metrics_listeners=metrics_listeners,
+                     snapshotter=snapshotter, resume_from=cfg.CONF.resume)
+
+
+def run():
+    utils.init_config_and_logging(config.ENGINE_OPTS)
+
     scenario = utils.read_yaml_file(
         cfg.CONF.scenario,
         alias_mapper=(lambda f: config.SCENARIOS + '%s.yaml' % f))
 
-    with rq.Connection(redis_connection):
-        LOG.info('Connected to Redis')
-        core.process(scenario, cfg.CONF.interval)
+    recorder = None
+    if cfg.CONF.metrics_out:
+        recorder = export.make_writer(cfg.CONF.metrics_out)
+        recorder.start()
+
+    metrics_listeners = []
+    exporter = None
+    if cfg.CONF.prometheus_port is not None:
+        exporter = prometheus.Exporter(cfg.CONF.prometheus_port)
+        exporter.start()
+        metrics_listeners.append(exporter.update)
+
+    snapshotter = None
+    if cfg.CONF.snapshot:
+        snapshotter = snapshot.Snapshotter(cfg.CONF.snapshot,
+                                           cfg.CONF.snapshot_interval)
+
+    profiler = None
+    if cfg.CONF.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        if cfg.CONF.executor == 'rq':
+            play(scenario, recorder, metrics_listeners, snapshotter)
+        else:
+            play_locally(scenario, recorder, metrics_listeners, snapshotter)
+    finally:
+        if snapshotter:
+            snapshotter.wait()
+        if exporter:
+            exporter.stop()
+        if recorder:
+            recorder.close()
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(cfg.CONF.profile)
+            LOG.info('Profile is written into %s', cfg.CONF.profile)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,119 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import io
+import json
+import threading
+import time
+
+from oslo_log import log as logging
+from six.moves import queue as queue_pkg
+
+LOG = logging.getLogger(__name__)
+
+FIELDS = ('time', 'kind', 'name', 'value', 'detail')
+KIND_METRIC = 'metric'  # detail is the metric type
+KIND_TASK = 'task'  # value is duration, detail is the task id
+KIND_STAGE = 'stage'  # value is "start" or "end"
+
+BUFFER_SIZE = 1024 * 1024
+
+
+def make_record(kind, name, value, detail=None, timestamp=None):
+    return dict(time=timestamp or time.time(), kind=kind, name=name,
+                value=value, detail=detail)
+
+
+class RecordWriter(object):
+    """Appends records of a run to a file in a background thread.
+
+    Every record has the fields listed in FIELDS. Callers only put records
+    into a queue; the thread writes whatever has accumulated and flushes
+    the file when the queue is drained.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue_pkg.Queue()
+        self.thread = threading.Thread(target=self._run,
+                                       name='metrics-writer')
+        self.thread.daemon = True
+
+    def start(self):
+        self.thread.start()
+
+    def write(self, records):
+        # records is a list of dicts made by make_record()
+        self.queue.put(records)
+
+    def record(self, kind, name, value, detail=None):
+        self.write([make_record(kind, name, value, detail)])
+
+    def record_metrics(self, updates):
+        # updates is a dict: metric -> metrics.Metric
+        self.write([make_record(KIND_METRIC, metric, m.value,
+                                m.metric_type, m.timestamp)
+                    for metric, m in updates.items()])
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        LOG.info('Run records are written into %s', self.path)
+
+    def _open(self):
+        return io.open(self.path, 'a', buffering=BUFFER_SIZE, newline='')
+
+    def _write(self, f, records):
+        raise NotImplementedError()
+
+    def _run(self):
+        with self._open() as f:
+            self._start(f)
+            while True:
+                batch = self.queue.get()
+                while batch is not None:
+                    self._write(f, batch)
+                    try:
+                        batch = self.queue.get_nowait()
+                    except queue_pkg.Empty:
+                        break
+
+                f.flush()
+                if batch is None:
+                    break
+
+    def _start(self, f):
+        pass
+
+
+class JSONLinesWriter(RecordWriter):
+    def _write(self, f, records):
+        f.write(u''.join(json.dumps(r) + u'\n' for r in records))
+
+
+class CSVWriter(RecordWriter):
+    def _start(self, f):
+        self.writer = csv.DictWriter(f, FIELDS)
+        if f.tell() == 0:
+            self.writer.writeheader()
+
+    def _write(self, f, records):
+        self.writer.writerows(records)
+
+
+def make_writer(path):
+    # the format is chosen by file extension, JSON lines by default
+    if path.endswith('.csv'):
+        return CSVWriter(path)
+    return JSONLinesWriter(path)
@@ -0,0 +1,84 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import math
+
+PERCENTILES = (50, 90, 99)
+
+
+class Histogram(object):
+    """Counts values in logarithmic buckets.
+
+    Boundaries of buckets grow by factor `ratio`, so a percentile is
+    known within relative error of (ratio - 1) whatever the range of
+    values is, and memory depends only on that range. Histograms with
+    the same ratio and resolution are merged by adding counts.
+    """
+
+    def __init__(self, ratio=1.02, resolution=1e-6):
+        self.ratio = ratio
+        self.resolution = resolution  # values below it share bucket 0
+        self.log_ratio = math.log(ratio)
+        self.counts = collections.defaultdict(int)  # bucket -> count
+        self.total = 0
+        self.max = 0
+
+    def _bucket(self, value):
+        if value < self.resolution:
+            return 0
+        return int(math.log(value / self.resolution) / self.log_ratio) + 1
+
+    def _value(self, bucket):
+        # geometric middle of the bucket
+        if bucket == 0:
+            return 0
+        return self.resolution * self.ratio ** (bucket - 0.5)
+
+    def record(self, value):
+        self.counts[self._bucket(value)] += 1
+        self.total += 1
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        if (other.ratio, other.resolution) != (self.ratio, self.resolution):
+            raise ValueError('Histograms with different buckets '
+                             'cannot be merged')
+        for bucket, count in other.counts.items():
+            self.counts[bucket] += count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def get_percentiles(self, percentiles=PERCENTILES):
+        # returns list of values for sorted percentiles in a single pass
+        result = []
+        if not self.total:
+            return result
+
+        ranks = [max(1, int(math.ceil(p / 100.0 * self.total)))
+                 for p in percentiles]
+        seen = 0
+        buckets = iter(sorted(self.counts.items()))
+        for rank in ranks:
+            while seen < rank:
+                bucket, count = next(buckets)
+                seen += count
+            result.append(min(self._value(bucket), self.max))
+        return result
+
+    def get_percentile(self, percentile):
+        values = self.get_percentiles([percentile])
+        return values[0] if values else None
+
+    def __len__(self):
+        return self.total
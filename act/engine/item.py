@@ -12,25 +12,28 @@
 # limitations under the License.
 
 from oslo_log import log as logging
-
-from act.engine import utils
+import six
 
 
 LOG = logging.getLogger(__name__)
 
 
 USE_LIMIT_INF = 100000
+EMPTY_PAYLOAD = {}  # shared by all items without payload, do not modify
 
 
 class Item(object):
+    __slots__ = ('item_type', 'payload', 'id', 'use_limit', 'read_only',
+                 'dependencies', 'locked', 'use_count')
+
     def __init__(self, item_type, payload=None, use_limit=USE_LIMIT_INF,
-                 read_only=False):
-        self.item_type = item_type
-        self.payload = payload or {}
-        self.id = utils.make_id()  # unique id
+                 read_only=False, item_id=None):
+        self.item_type = six.moves.intern(item_type)
+        self.payload = payload or EMPTY_PAYLOAD
+        self.id = item_id  # unique integer id, assigned by the world
         self.use_limit = use_limit  # max number of users of this item
         self.read_only = read_only  # True if item cannot be deleted
-        self.dependencies = []
+        self.dependencies = ()
 
         # locks
         self.locked = False  # True if the item is locked exclusively
@@ -42,7 +45,7 @@ class Item(object):
                         use_count=self.use_count, locked=self.locked))
 
     def set_dependencies(self, dependencies):
-        self.dependencies = dependencies
+        self.dependencies = tuple(dependencies)
 
     def lock(self):
         self.locked = True
@@ -16,18 +16,32 @@ import json
 import time
 
 from oslo_log import log as logging
+import redis
 import rq
 
 LOG = logging.getLogger(__name__)
 
 
 KEY_METRICS = 'act_metrics'
+KEY_SERIES = 'act_series:%(resolution)s:%(metric)s'
+# every batch of metric updates is published here as JSON object
+# metric -> Metric, null is published when metrics are cleared
+CHANNEL_METRICS = 'act_metrics_updates'
 MOOD_HAPPY = 'happy'
 MOOD_SAD = 'sad'
 
 METRIC_TYPE_SUMMARY = 'summary'
 METRIC_TYPE_ACTIONS = 'actions'
 METRIC_TYPE_OBJECTS = 'objects'
+METRIC_TYPE_WORKERS = 'workers'
+METRIC_TYPE_ENGINE = 'engine'
+METRIC_TYPE_LATENCY = 'latency'
+# types of metrics measured in milliseconds rather than counted
+TIMING_METRIC_TYPES = (METRIC_TYPE_ENGINE, METRIC_TYPE_LATENCY)
+
+# (seconds per point, number of points kept): 1 hour by 1 second,
+# 6 hours by 10 seconds and 24 hours by 1 minute
+RESOLUTIONS = ((1, 3600), (10, 2160), (60, 1440))
 
 Metric = collections.namedtuple(
     'Metric', ['metric_type', 'value', 'timestamp', 'mood'])
@@ -38,6 +52,13 @@ def clear():
     redis_connection = rq.connections.get_current_connection()
     redis_connection.delete(KEY_METRICS)
 
+    series_keys = list(redis_connection.scan_iter(
+        KEY_SERIES % dict(resolution='*', metric='*')))
+    if series_keys:
+        redis_connection.delete(*series_keys)
+
+    redis_connection.publish(CHANNEL_METRICS, json.dumps(None))
+
 
 def set_metric(metric_type, metric, value, mood=MOOD_HAPPY):
     m = Metric(metric_type=metric_type, value=value, timestamp=time.time(),
@@ -45,6 +66,307 @@ def set_metric(metric_type, metric, value, mood=MOOD_HAPPY):
     # LOG.debug('Set metric %s = %s', metric, m)
     redis_connection = rq.connections.get_current_connection()
     redis_connection.hset(KEY_METRICS, metric, json.dumps(m))
+    redis_connection.publish(CHANNEL_METRICS, json.dumps({metric: m}))
+
+
+class Rollups(object):
+    """Maps metric updates onto points of fixed-resolution time series.
+
+    Every series keeps at most the configured number of points, the point
+    holds the last value written within its time slot. Metrics that do
+    not change produce no points, so a series is a step function.
+    """
+
+    def __init__(self, resolutions=RESOLUTIONS):
+        self.resolutions = resolutions
+        # (resolution, metric) -> start of the last slot written
+        self.last_slots = {}
+
+    def get_points(self, metric, timestamp):
+        # yields (resolution, size, slot start, True if slot is new)
+        for resolution, size in self.resolutions:
+            slot = int(timestamp // resolution) * resolution
+            key = (resolution, metric)
+            is_new = self.last_slots.get(key) != slot
+            self.last_slots[key] = slot
+            yield resolution, size, slot, is_new
+
+    def clear(self):
+        self.last_slots.clear()
+
+
+class RedisSink(object):
+    """Stores metrics in Redis, where act-monitor reads them.
+
+    The last values are kept in a hash, the history of every metric is
+    kept in capped lists, one per resolution.
+    """
+
+    def __init__(self, resolutions=RESOLUTIONS):
+        self.rollups = Rollups(resolutions)
+
+    def clear(self):
+        clear()
+        self.rollups.clear()
+
+    def write(self, updates):
+        # updates is a dict: metric -> Metric
+        redis_connection = rq.connections.get_current_connection()
+        pipe = redis_connection.pipeline(transaction=False)
+        # one entry per command: (key, point, size) for lset, None otherwise
+        commands = []
+        for metric, m in updates.items():
+            pipe.hset(KEY_METRICS, metric, json.dumps(m))
+            commands.append(None)
+
+            for resolution, size, slot, is_new in self.rollups.get_points(
+                    metric, m.timestamp):
+                key = KEY_SERIES % dict(resolution=resolution, metric=metric)
+                point = json.dumps((slot, m.value))
+                if is_new:
+                    pipe.rpush(key, point)
+                    pipe.ltrim(key, -size, -1)
+                    commands.extend((None, None))
+                else:
+                    pipe.lset(key, -1, point)
+                    commands.append((key, point, size))
+
+        pipe.publish(CHANNEL_METRICS, json.dumps(updates))
+        commands.append(None)
+
+        # lset fails if the series is gone, e.g. metrics were cleared
+        # during the run, then the point starts the series anew
+        missing = []
+        results = pipe.execute(raise_on_error=False)
+        for command, result in zip(commands, results):
+            if isinstance(result, Exception):
+                if (command is None or
+                        not isinstance(result, redis.ResponseError)):
+                    raise result
+                missing.append(command)
+
+        if missing:
+            pipe = redis_connection.pipeline(transaction=False)
+            for key, point, size in missing:
+                pipe.rpush(key, point)
+                pipe.ltrim(key, -size, -1)
+            pipe.execute()
+
+    def get_all_metrics(self):
+        return get_all_metrics()
+
+    def get_series(self, metric, resolution):
+        return get_series(metric, resolution)
+
+
+class MemorySink(object):
+    """Keeps metrics and their history in memory of the engine process."""
+
+    def __init__(self, resolutions=RESOLUTIONS):
+        self.metrics = {}
+        self.rollups = Rollups(resolutions)
+        self.series = {}  # (resolution, metric) -> deque of points
+
+    def clear(self):
+        self.metrics = {}
+        self.series = {}
+        self.rollups.clear()
+
+    def write(self, updates):
+        self.metrics.update(updates)
+
+        for metric, m in updates.items():
+            for resolution, size, slot, is_new in self.rollups.get_points(
+                    metric, m.timestamp):
+                key = (resolution, metric)
+                if key not in self.series:
+                    self.series[key] = collections.deque(maxlen=size)
+                points = self.series[key]
+                if not is_new:
+                    points.pop()
+                points.append((slot, m.value))
+
+    def get_all_metrics(self):
+        return dict(self.metrics)
+
+    def get_series(self, metric, resolution):
+        return list(self.series.get((resolution, metric), ()))
+
+
+class MetricsBuffer(object):
+    """Collects metric updates and writes them to the sink in one go.
+
+    Updates that do not change the previously written value are dropped.
+    Flush is skipped if the previous one happened less than
+    `flush_interval` seconds ago, unless it is forced.
+    """
+
+    def __init__(self, flush_interval=0, sink=None):
+        self.flush_interval = flush_interval
+        self.sink = sink or RedisSink()
+        self.pending = {}  # metric -> (metric_type, value, mood)
+        self.flushed = {}  # metric -> (metric_type, value, mood)
+        self.last_flush = 0
+        # callables notified with every batch of written updates
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def set_metric(self, metric_type, metric, value, mood=MOOD_HAPPY):
+        update = (metric_type, value, mood)
+        if self.flushed.get(metric) == update:
+            self.pending.pop(metric, None)  # returned to the flushed value
+        else:
+            self.pending[metric] = update
+
+    def flush(self, force=False):
+        # returns dict metric -> Metric of the written updates
+        now = time.time()
+        if not self.pending:
+            return {}
+        if not force and now - self.last_flush < self.flush_interval:
+            return {}
+
+        updates = dict(
+            (metric, Metric(metric_type=metric_type, value=value,
+                            timestamp=now, mood=mood))
+            for metric, (metric_type, value, mood) in self.pending.items())
+        self.sink.write(updates)
+        for listener in self.listeners:
+            listener(updates)
+
+        LOG.debug('Flushed %s metrics', len(self.pending))
+        self.flushed.update(self.pending)
+        self.pending = {}
+        self.last_flush = now
+        return updates
+
+
+class TickTimer(object):
+    """Measures how long every phase of the engine loop takes.
+
+    Durations of completed ticks are accumulated until reset, so reported
+    values are averages over all ticks since the previous reset.
+    """
+
+    def __init__(self):
+        self.totals = collections.defaultdict(float)  # phase -> seconds
+        self.ticks = 0
+        self.current = {}  # phase -> seconds, in the current tick
+        self.tick_started = 0
+        self.phase_started = 0
+
+    def start_tick(self):
+        self.tick_started = self.phase_started = time.time()
+        self.current = {}
+
+    def end_phase(self, phase):
+        now = time.time()
+        self.current[phase] = now - self.phase_started
+        self.phase_started = now
+
+    def end_tick(self):
+        self.current['tick'] = time.time() - self.tick_started
+        for phase, duration in self.current.items():
+            self.totals[phase] += duration
+        self.ticks += 1
+
+    def get_averages(self):
+        # returns mapping phase -> average duration in milliseconds
+        if not self.ticks:
+            return {}
+        return dict((phase, total * 1000.0 / self.ticks)
+                    for phase, total in self.totals.items())
+
+    def reset(self):
+        self.totals.clear()
+        self.ticks = 0
+
+
+def get_series(metric, resolution):
+    # returns list of (timestamp, value) points of the metric history
+    redis_connection = rq.connections.get_current_connection()
+    key = KEY_SERIES % dict(resolution=resolution, metric=metric)
+    return [tuple(json.loads(point))
+            for point in redis_connection.lrange(key, 0, -1)]
+
+
+def get_rate(points):
+    # returns average change per second over the points, None if unknown
+    if len(points) < 2:
+        return None
+    (t0, v0), (t1, v1) = points[0], points[-1]
+    if t1 == t0:
+        return None
+    return float(v1 - v0) / (t1 - t0)
+
+
+class MetricsView(object):
+    """Local copy of all metrics kept up to date via Redis pub/sub.
+
+    Metrics are loaded once, then only the published updates are applied,
+    so watching metrics does not poll Redis. Points of tracked metrics
+    received within the last `window` seconds are kept as history.
+    """
+
+    def __init__(self, tracked=(), window=10):
+        redis_connection = rq.connections.get_current_connection()
+        self.pubsub = redis_connection.pubsub(ignore_subscribe_messages=True)
+        # subscribe before loading, so that no update is missed
+        self.pubsub.subscribe(CHANNEL_METRICS)
+
+        self.window = window
+        self.metrics = {}
+        # metric -> deque of (timestamp, value)
+        self.history = dict((metric, collections.deque())
+                            for metric in tracked)
+        self.reload()
+
+    def reload(self):
+        self.metrics = dict((_to_str(key), m)
+                            for key, m in get_all_metrics().items())
+        for metric, points in self.history.items():
+            points.clear()
+            points.extend(get_series(metric, 1)[-self.window:])
+
+    def _apply(self, data):
+        updates = json.loads(data)
+        if updates is None:  # metrics were cleared
+            self.reload()
+            return
+
+        for metric, raw in updates.items():
+            m = Metric(*raw)
+            self.metrics[metric] = m
+            if metric in self.history:
+                self.history[metric].append((m.timestamp, m.value))
+
+    def update(self, timeout):
+        # waits up to timeout for updates and applies all of them,
+        # returns True if any update was received
+        changed = False
+        message = self.pubsub.get_message(timeout=timeout)
+        while message:
+            if message['type'] == 'message':
+                self._apply(message['data'])
+                changed = True
+            message = self.pubsub.get_message()
+        return changed
+
+    def get_history(self, metric):
+        points = self.history[metric]
+        while points and points[0][0] < time.time() - self.window:
+            points.popleft()
+        return list(points)
+
+    def close(self):
+        self.pubsub.close()
+
+
+def _to_str(key):
+    # Redis returns keys as bytes on Python 3
+    return key.decode('utf-8') if isinstance(key, bytes) else key
 
 
 def get_all_metrics():
@@ -13,7 +13,7 @@
 # limitations under the License.
 
 import functools
-import time
+import shutil
 
 import click
 from oslo_config import cfg
@@ -39,6 +39,19 @@ LOGO2 = """
 |____| |____    |
 """
 
+CLEAR_SCREEN = '\x1b[2J\x1b[?25l'  # also hides the cursor
+MOVE_CURSOR = '\x1b[%d;1H'  # to the beginning of the row (1-based)
+CLEAR_LINE = '\x1b[K'  # from the cursor to the end of the line
+RESET_STYLE = '\x1b[0m'
+SHOW_CURSOR = '\x1b[?25h'
+
+RATE_WINDOW = 10  # seconds over which rate of operations is averaged
+
+try:
+    get_terminal_size = click.get_terminal_size
+except AttributeError:  # removed in click 8.1
+    get_terminal_size = shutil.get_terminal_size
+
 green = functools.partial(click.style, fg='green')
 red = functools.partial(click.style, fg='red')
 
@@ -52,8 +65,12 @@ def get_scale(x):
     return x
 
 
-def make_canvas(width, height):
-    return [[' ' for x in range(width)] for y in range(height)]
+class Canvas(list):
+    """List of text lines of at most `width` characters."""
+
+    def __init__(self, width, height):
+        super(Canvas, self).__init__([''] * height)
+        self.width = width
 
 
 def place(canvas, block, x, y):
@@ -61,27 +78,58 @@ def place(canvas, block, x, y):
     for i, line in enumerate(lines):
         if y + i >= len(canvas):
             break
-        for j, ch in enumerate(line):
-            if j + x >= len(canvas[y + i]):
-                break
-            canvas[y + i][j + x] = ch
+        current = canvas[y + i].ljust(x)
+        line = line[:max(0, canvas.width - x)]
+        canvas[y + i] = current[:x] + line + current[x + len(line):]
+
+
+class Screen(object):
+    """Draws frames in the terminal, sending only the lines that changed.
 
+    Lines are addressed with cursor movement escape codes, so the screen
+    is never cleared except on the first frame or when the terminal size
+    changes.
+    """
 
-def render(canvas):
-    for line in canvas:
-        click.echo(''.join(line))
+    def __init__(self, stream=None):
+        self.stream = stream or click.get_text_stream('stdout')
+        self.previous = None  # lines of the previous frame
 
+    def render(self, canvas):
+        out = []
+        previous = self.previous
+        if previous is None or len(previous) != len(canvas):
+            out.append(CLEAR_SCREEN)
+            previous = [''] * len(canvas)
 
-def show():
-    click.clear()
+        for row, line in enumerate(canvas):
+            if line != previous[row]:
+                out.append(MOVE_CURSOR % (row + 1))
+                out.append(line)
+                out.append(RESET_STYLE + CLEAR_LINE)
 
-    term_width, term_height = click.get_terminal_size()
-    canvas = make_canvas(term_width, term_height - 1)
+        self.previous = list(canvas)
+        if out:
+            self.stream.write(''.join(out))
+            self.stream.flush()
+
+    def close(self):
+        last_row = len(self.previous or ()) + 1
+        self.stream.write(MOVE_CURSOR % last_row + SHOW_CURSOR)
+        self.stream.flush()
+
+
+def show(screen, view):
+    term_width, term_height = get_terminal_size()
+    canvas = Canvas(term_width, term_height - 1)
 
     chart_width = min(20, term_width - 20)
 
-    m = metrics.get_all_metrics()
-    max_count = max(m.value for m in m.values())
+    m = view.metrics
+    # timings are not charted against counters
+    max_count = max([m.value for m in m.values()
+                     if m.metric_type not in metrics.TIMING_METRIC_TYPES] or
+                    [0])
 
     scale = get_scale(max_count)
     ratio = chart_width * 1.0 / scale
@@ -92,19 +140,24 @@ def show():
     for key in keys:
         metric = m[key]
         count = metric.value
-        color = green if metric.mood == metrics.MOOD_HAPPY else red
-        chart = color('|' + u'█' * int(ratio * count))
+        if metric.metric_type in metrics.TIMING_METRIC_TYPES:
+            chart = ''
+        else:
+            color = green if metric.mood == metrics.MOOD_HAPPY else red
+            chart = color('|' + u'█' * int(ratio * count))
 
         t.append([key, count, chart])
 
     place(canvas, LOGO2, 0, 0)
 
+    rate = metrics.get_rate(view.get_history('operation'))
+    if rate is not None:
+        place(canvas, 'ops/s: %.1f' % rate, 0, 5)
+
     s = tabulate(t, headers=headers, tablefmt='simple')
     place(canvas, s, 25, 0)
 
-    render(canvas)
-
-    time.sleep(cfg.CONF.interval)
+    screen.render(canvas)
 
 
 def run():
@@ -112,12 +165,21 @@ def run():
 
     redis_connection = utils.make_redis_connection(host=cfg.CONF.redis_host,
                                                    port=cfg.CONF.redis_port)
+    screen = Screen()
     with rq.Connection(redis_connection):
+        view = metrics.MetricsView(tracked=['operation'], window=RATE_WINDOW)
         try:
             while True:
-                show()
+                show(screen, view)
+                # the screen is redrawn at least once per interval, so that
+                # the rate goes down when nothing happens; only changed
+                # lines are sent anyway
+                view.update(cfg.CONF.interval)
         except KeyboardInterrupt:
             LOG.info('Shutdown')
+        finally:
+            view.close()
+            screen.close()
 
 
 if __name__ == '__main__':
@@ -11,17 +11,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from oslo_log import log as logging
-
-LOG = logging.getLogger(__name__)
-
-
 class Operation(object):
     def __init__(self, task_id):
         self.task_id = task_id
+        self.duration = None  # seconds spent by worker in the action
 
-    def do(self, world):
-        LOG.info('Do nothing')
+    def get_changes(self):
+        # returns new items (with dependencies set) and ids of deleted items
+        return (), ()
 
     def __repr__(self):
         return '%s(%s)' % (type(self).__name__, self.task_id)
@@ -31,30 +28,29 @@ class CreateOperation(Operation):
     def __init__(self, item, dependencies, task_id):
         super(CreateOperation, self).__init__(task_id)
         self.item = item
-        self.dependencies = dependencies
+        self.dependencies = dependencies  # ids of items
 
-    def do(self, world):
-        world.put(self.item, self.dependencies)
-        LOG.info('Created item: %s', self.item)
+    def get_changes(self):
+        self.item.set_dependencies(self.dependencies)
+        return (self.item,), ()
 
 
 class BatchCreateOperation(Operation):
     def __init__(self, new_items, dependencies, task_id):
         super(BatchCreateOperation, self).__init__(task_id)
         self.new_items = new_items
-        self.dependencies = dependencies
+        self.dependencies = dependencies  # ids of items
 
-    def do(self, world):
+    def get_changes(self):
         for one in self.new_items:
-            world.put(one, self.dependencies)
-        LOG.info('Created items: %s', self.new_items)
+            one.set_dependencies(self.dependencies)
+        return self.new_items, ()
 
 
 class DeleteOperation(Operation):
-    def __init__(self, item, task_id):
+    def __init__(self, item_id, task_id):
         super(DeleteOperation, self).__init__(task_id)
-        self.item = item
+        self.item_id = item_id
 
-    def do(self, world):
-        world.pop(self.item)
-        LOG.info('Deleted item: %s', self.item)
+    def get_changes(self):
+        return (), (self.item_id,)
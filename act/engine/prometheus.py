@@ -0,0 +1,154 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import numbers
+import threading
+
+from oslo_log import log as logging
+from six.moves import BaseHTTPServer
+
+from act.engine import metrics
+
+LOG = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+Sample = collections.namedtuple(
+    'Sample', ['family', 'metric_type', 'labels', 'value'])
+
+
+def escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def format_samples(samples):
+    # renders samples in Prometheus text exposition format
+    families = collections.OrderedDict()
+    for sample in sorted(samples, key=lambda s: s.family):
+        families.setdefault((sample.family, sample.metric_type),
+                            []).append(sample)
+
+    lines = []
+    for (family, metric_type), family_samples in families.items():
+        lines.append('# TYPE %s %s' % (family, metric_type))
+        for sample in family_samples:
+            labels = ','.join('%s="%s"' % (k, escape(v))
+                              for k, v in sorted(sample.labels.items()))
+            lines.append('%s{%s} %r' % (family, labels,
+                                        float(sample.value)))
+    return '\n'.join(lines) + '\n'
+
+
+def _latency_sample(metric, value):
+    # latency.<action>.<stat>_ms or stage.<title>.<stat>_ms
+    kind, rest = metric.split('.', 1)
+    name, stat = rest.rsplit('.', 1)
+    stat = stat[:-len('_ms')]
+    quantile = '1' if stat == 'max' else str(int(stat[1:]) / 100.0)
+
+    label = 'action' if kind == 'latency' else 'stage'
+    return Sample('act_%s_latency_seconds' % label, 'gauge',
+                  {label: name, 'quantile': quantile}, value / 1000.0)
+
+
+def make_sample(metric, m):
+    # maps engine metric onto Prometheus sample, None if it has no value
+    if not isinstance(m.value, numbers.Number):
+        return None
+
+    if m.metric_type == metrics.METRIC_TYPE_LATENCY:
+        return _latency_sample(metric, m.value)
+    if m.metric_type == metrics.METRIC_TYPE_ENGINE:
+        # engine.<phase>_ms
+        phase = metric.split('.', 1)[1][:-len('_ms')]
+        return Sample('act_engine_phase_seconds', 'gauge', {'phase': phase},
+                      m.value / 1000.0)
+    return Sample('act_%s' % m.metric_type, 'gauge', {'name': metric},
+                  m.value)
+
+
+class Exporter(object):
+    """Serves metrics at /metrics over HTTP from a background thread.
+
+    The engine passes flushed metric updates to update(), which only
+    stores them; formatting happens when Prometheus scrapes. Collectors
+    are callables returning extra samples, they are called on scrape too.
+    """
+
+    def __init__(self, port, host=''):
+        self.metrics = {}  # metric -> metrics.Metric
+        self.collectors = []
+        self.server = BaseHTTPServer.HTTPServer((host, port),
+                                                self._make_handler())
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       name='prometheus-exporter')
+        self.thread.daemon = True
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def _make_handler(self):
+        exporter = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                LOG.debug('Prometheus exporter: ' + fmt, *args)
+
+        return Handler
+
+    def start(self):
+        self.thread.start()
+        LOG.info('Serving Prometheus metrics on port %s', self.port)
+
+    def update(self, updates):
+        # updates is a dict: metric -> metrics.Metric
+        self.metrics.update(updates)
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def collect(self):
+        samples = []
+        for metric, m in dict(self.metrics).items():
+            sample = make_sample(metric, m)
+            if sample:
+                samples.append(sample)
+        for collector in self.collectors:
+            samples.extend(collector())
+        return samples
+
+    def render(self):
+        return format_samples(self.collect())
+
+    def close_socket(self):
+        # for forked children, which must not hold the listening socket
+        self.server.socket.close()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
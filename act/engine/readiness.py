@@ -0,0 +1,91 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import collections
+
+from act.engine import utils
+
+
+class ReadinessCache(object):
+    """Remembers which actions have items of all types they depend on.
+
+    An action is re-checked only after the world reports that availability
+    of one of its dependency types has changed. Actions that are both ready
+    and enabled are kept in a weighted sampler, so choosing one does not
+    depend on the number of registered actions.
+    """
+
+    def __init__(self, world, actions):
+        self.world = world
+        # action -> {item_type: {item_id}} or None if action is not ready
+        self.candidates = {}
+        self.dirty = set(actions)
+        # item type -> {action}
+        self.type_to_actions = collections.defaultdict(set)
+        # actions allowed to be chosen
+        self.enabled = set()
+        # ready and enabled actions
+        self.sampler = utils.WeightedSampler()
+
+        for action in actions:
+            for item_type in action.get_depends_on() or ():
+                self.type_to_actions[item_type].add(action)
+
+        world.add_listener(self.invalidate)
+
+    def invalidate(self, item_type):
+        self.dirty.update(self.type_to_actions.get(item_type, ()))
+
+    def _check(self, action):
+        candidates = {}
+        for item_type in action.get_depends_on() or ():
+            ids = action.filter_items(self.world, item_type)
+            if not ids:
+                return None
+            candidates[item_type] = ids
+        return candidates
+
+    def _update_sampler(self, action):
+        if (action in self.enabled and
+                self.candidates.get(action) is not None):
+            if action not in self.sampler:
+                self.sampler.add(action, action.get_weight())
+        else:
+            self.sampler.discard(action)
+
+    def refresh(self):
+        for action in self.dirty:
+            self.candidates[action] = self._check(action)
+            self._update_sampler(action)
+        self.dirty.clear()
+
+    def enable(self, actions):
+        # makes only the specified actions eligible for choice
+        actions = set(actions)
+        changed = actions ^ self.enabled
+        self.enabled = actions
+        for action in changed:
+            self._update_sampler(action)
+
+    def disable(self, action):
+        self.enabled.discard(action)
+        self.sampler.discard(action)
+
+    def choose(self):
+        # returns random ready and enabled action (respecting weights),
+        # None if there is no such action
+        self.refresh()
+        if not self.sampler:
+            return None
+        return self.sampler.choice()
@@ -24,6 +24,7 @@ import act
 LOG = logging.getLogger(__name__)
 
 REGISTRY = []
+REGISTRY_BY_NAME = {}  # action name -> action
 
 
 def import_modules_from_package(package):
@@ -50,6 +51,7 @@ def import_modules_from_package(package):
 
 def init():
     global REGISTRY
+    global REGISTRY_BY_NAME
 
     modules = import_modules_from_package('act.actions')
 
@@ -59,9 +61,16 @@ def init():
         klazz_list += [ci[1] for ci in class_info_list]
 
     REGISTRY = [k() for k in klazz_list]
+    REGISTRY_BY_NAME = dict((str(a), a) for a in REGISTRY)
 
     LOG.info('Registry: %s', REGISTRY)
 
 
 def get_actions():
     return REGISTRY
+
+
+def get_action(name):
+    if not REGISTRY:
+        init()
+    return REGISTRY_BY_NAME[name]
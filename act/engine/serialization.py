@@ -0,0 +1,144 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import pickle
+
+import msgpack
+
+from act.engine import item as item_pkg
+from act.engine import operations
+
+
+class Serializer(object):
+    """Encodes messages exchanged between the engine and workers.
+
+    A task message is a tuple (task id, action name, items), where items
+    is a list of tuples (item id, item type, payload). Results of tasks
+    are instances of operations.Operation.
+    """
+    name = None
+
+    def dump_task(self, message):
+        raise NotImplementedError()
+
+    def load_task(self, data):
+        raise NotImplementedError()
+
+    def dump_operation(self, operation):
+        raise NotImplementedError()
+
+    def load_operation(self, data):
+        raise NotImplementedError()
+
+
+class PickleSerializer(Serializer):
+    name = 'pickle'
+
+    def dump_task(self, message):
+        return pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+
+    def load_task(self, data):
+        return pickle.loads(data)
+
+    def dump_operation(self, operation):
+        return pickle.dumps(operation, pickle.HIGHEST_PROTOCOL)
+
+    def load_operation(self, data):
+        return pickle.loads(data)
+
+
+# operation codes used by msgpack serializer
+OP_NOOP = 0
+OP_CREATE = 1
+OP_BATCH_CREATE = 2
+OP_DELETE = 3
+
+
+def _dump_item(item):
+    return item.item_type, item.payload, item.use_limit, item.read_only
+
+
+def _load_item(raw):
+    item_type, payload, use_limit, read_only = raw
+    return item_pkg.Item(item_type, payload, use_limit=use_limit,
+                         read_only=read_only)
+
+
+class MsgpackSerializer(Serializer):
+    """Schema-based encoding into msgpack arrays.
+
+    Operations are encoded as [code, task id, duration, fields...], new
+    items as [item type, payload, use limit, read only]. Payloads must
+    consist of types supported by msgpack.
+    """
+    name = 'msgpack'
+
+    def _pack(self, obj):
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def _unpack(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+    def dump_task(self, message):
+        return self._pack(message)
+
+    def load_task(self, data):
+        task_id, action_name, raw_items = self._unpack(data)
+        return task_id, action_name, [tuple(i) for i in raw_items]
+
+    def dump_operation(self, op):
+        op_type = type(op)
+        if op_type is operations.CreateOperation:
+            raw = (OP_CREATE, op.task_id, op.duration, _dump_item(op.item),
+                   op.dependencies)
+        elif op_type is operations.BatchCreateOperation:
+            raw = (OP_BATCH_CREATE, op.task_id, op.duration,
+                   [_dump_item(i) for i in op.new_items], op.dependencies)
+        elif op_type is operations.DeleteOperation:
+            raw = (OP_DELETE, op.task_id, op.duration, op.item_id)
+        elif op_type is operations.Operation:
+            raw = (OP_NOOP, op.task_id, op.duration)
+        else:
+            raise TypeError('Operation %s is not supported by %s serializer'
+                            % (op_type.__name__, self.name))
+        return self._pack(raw)
+
+    def load_operation(self, data):
+        raw = self._unpack(data)
+        code, task_id = raw[0], raw[1]
+
+        if code == OP_CREATE:
+            op = operations.CreateOperation(
+                item=_load_item(raw[3]), dependencies=raw[4],
+                task_id=task_id)
+        elif code == OP_BATCH_CREATE:
+            op = operations.BatchCreateOperation(
+                new_items=[_load_item(i) for i in raw[3]],
+                dependencies=raw[4], task_id=task_id)
+        elif code == OP_DELETE:
+            op = operations.DeleteOperation(item_id=raw[3], task_id=task_id)
+        elif code == OP_NOOP:
+            op = operations.Operation(task_id)
+        else:
+            raise ValueError('Unknown operation code: %s' % code)
+
+        op.duration = raw[2]
+        return op
+
+
+SERIALIZERS = dict((s.name, s) for s in (PickleSerializer, MsgpackSerializer))
+
+
+def get_serializer(name):
+    return SERIALIZERS[name]()
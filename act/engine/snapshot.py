@@ -0,0 +1,147 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import os
+
+import msgpack
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from act.engine import item as item_pkg
+from act.engine import world as world_pkg
+
+LOG = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+CHUNK_SIZE = 10000  # items packed per write
+
+
+def save(world, path, state=None):
+    """Writes the world into a file in msgpack format.
+
+    The file starts with a header map: format version, next item id,
+    table of item types, number of items and the engine state. It is
+    followed by one array per item: [id, type index, payload, use limit,
+    read only, dependency ids]. Payloads must consist of types supported
+    by msgpack. The file is replaced atomically.
+    """
+    types = sorted(world.type_to_ids)
+    type_index = dict((t, i) for i, t in enumerate(types))
+
+    # peek the next id without losing it
+    next_id = next(world.id_counter)
+    world.id_counter = itertools.count(next_id)
+
+    packer = msgpack.Packer(use_bin_type=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(packer.pack(dict(version=FORMAT_VERSION, next_id=next_id,
+                                 types=types, items=len(world.storage),
+                                 state=state or {})))
+        chunk = []
+        for item in world.storage.values():
+            chunk.append(packer.pack((
+                item.id, type_index[item.item_type], item.payload,
+                item.use_limit, item.read_only, item.dependencies)))
+            if len(chunk) == CHUNK_SIZE:
+                f.write(b''.join(chunk))
+                chunk = []
+        f.write(b''.join(chunk))
+
+    os.rename(tmp_path, path)
+    LOG.info('Saved snapshot of %s items into %s', len(world.storage), path)
+
+
+def load(path):
+    # returns the world and the engine state restored from the file;
+    # items reserved by tasks that were running are released
+    with open(path, 'rb') as f:
+        unpacker = msgpack.Unpacker(f, raw=False)
+        header = next(unpacker)
+        if header['version'] != FORMAT_VERSION:
+            raise ValueError('Unsupported snapshot version: %s' %
+                             header['version'])
+
+        types = header['types']
+        items = []
+        for item_id, type_idx, payload, use_limit, read_only, deps in unpacker:
+            one = item_pkg.Item(types[type_idx], payload, use_limit=use_limit,
+                                read_only=read_only, item_id=item_id)
+            one.set_dependencies(deps)
+            items.append(one)
+
+    world = world_pkg.World()
+    world.load_items(items, header['next_id'])
+    LOG.info('Loaded snapshot of %s items from %s', len(items), path)
+    return world, header['state']
+
+
+class Snapshotter(object):
+    """Periodically saves the world while the scenario is played.
+
+    Periodic snapshots are written by a forked child process, which sees
+    the world as it was at the moment of fork, so the engine loop only
+    pays for the fork itself. Pages changed by the engine meanwhile are
+    copied by the OS, so memory use may grow up to the size of the world
+    while the child runs. A new periodic snapshot is not started until
+    the previous one is written.
+    """
+
+    def __init__(self, path, interval=60):
+        self.path = path
+        self.pid = None  # child process writing the snapshot
+        self.watch = timeutils.StopWatch(duration=interval)
+        self.watch.start()
+
+    def _reap(self, options=0):
+        # returns True if there is no running child anymore
+        if self.pid is None:
+            return True
+        pid, status = os.waitpid(self.pid, options)
+        if pid == 0:
+            return False
+        if status:
+            LOG.error('Snapshot process %s exited with status %s',
+                      self.pid, status)
+        self.pid = None
+        return True
+
+    def is_due(self):
+        return self.watch.expired() and self._reap(os.WNOHANG)
+
+    def save(self, world, state):
+        self.watch.restart()
+        pid = os.fork()
+        if pid:
+            self.pid = pid
+            return
+
+        code = 0
+        try:
+            save(world, self.path, state)
+        except Exception:
+            LOG.exception('Failed to save snapshot into %s', self.path)
+            code = 1
+        finally:
+            os._exit(code)
+
+    def wait(self):
+        # waits until the snapshot being written in background is done
+        self._reap()
+
+    def save_now(self, world, state):
+        # saves in the calling process once the background save is done
+        self.wait()
+        self.watch.restart()
+        save(world, self.path, state)
@@ -11,7 +11,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import bisect
 import functools
 import itertools
 import logging as std_logging
@@ -214,16 +213,155 @@ def strict(s):
     return re.sub(r'[^\w\d]+', '_', re.sub(r'\(.+\)', '', s)).lower()
 
 
-def weighted_random_choice(items):
-    totals = []
-    running_total = 0
+class IndexedSet(object):
+    """Set that supports random choice of an element in O(1).
 
-    for item in items:
-        running_total += item.weight
-        totals.append(running_total)
+    Elements are stored in an array, their positions in a dict; removal
+    swaps the element with the last one in the array.
+    """
+
+    def __init__(self, iterable=()):
+        self.elements = []
+        self.positions = {}  # element -> index in elements
+        self.update(iterable)
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __contains__(self, element):
+        return element in self.positions
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __repr__(self):
+        return 'IndexedSet(%s)' % self.elements
+
+    def add(self, element):
+        if element not in self.positions:
+            self.positions[element] = len(self.elements)
+            self.elements.append(element)
+
+    def update(self, elements):
+        positions = self.positions
+        for element in elements:
+            if element not in positions:
+                positions[element] = len(self.elements)
+                self.elements.append(element)
+
+    def remove(self, element):
+        position = self.positions.pop(element)
+        last = self.elements.pop()
+        if position < len(self.elements):  # move the last one into the hole
+            self.elements[position] = last
+            self.positions[last] = position
+
+    def discard(self, element):
+        if element in self.positions:
+            self.remove(element)
+
+    def choice(self):
+        return random.choice(self.elements)
+
+
+class WeightedSampler(object):
+    """Weighted random choice over a changing set of objects.
+
+    Weights are kept in a Fenwick tree, so adding or removing an object and
+    choosing a random one take O(log n) regardless of how many objects
+    are in the set.
+    """
 
-    rnd = random.random() * running_total
-    return items[bisect.bisect_right(totals, rnd)]
+    def __init__(self):
+        self.tree = [0]  # Fenwick tree over slots, 1-based
+        self.weights = [0]  # slot -> weight
+        self.objects = [None]  # slot -> object
+        self.slots = {}  # object -> slot
+        self.free_slots = []
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, obj):
+        return obj in self.slots
+
+    def __iter__(self):
+        return iter(self.slots)
+
+    def _prefix_sum(self, slot):
+        total = 0
+        while slot > 0:
+            total += self.tree[slot]
+            slot -= slot & -slot
+        return total
+
+    def _update(self, slot, delta):
+        while slot < len(self.tree):
+            self.tree[slot] += delta
+            slot += slot & -slot
+
+    def _rebuild(self):
+        # recalculates the tree to get rid of accumulated rounding errors
+        self.tree = list(self.weights)
+        for slot in range(1, len(self.tree)):
+            parent = slot + (slot & -slot)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[slot]
+
+    def add(self, obj, weight):
+        if obj in self.slots:
+            self.remove(obj)
+
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.weights[slot] = weight
+            self._update(slot, weight)
+        else:  # append a new slot to the tree
+            slot = len(self.tree)
+            self.tree.append(weight + self._prefix_sum(slot - 1) -
+                             self._prefix_sum(slot - (slot & -slot)))
+            self.weights.append(weight)
+            self.objects.append(None)
+
+        self.objects[slot] = obj
+        self.slots[obj] = slot
+
+    def remove(self, obj):
+        slot = self.slots.pop(obj)
+        self._update(slot, -self.weights[slot])
+        self.weights[slot] = 0
+        self.objects[slot] = None
+        self.free_slots.append(slot)
+
+    def discard(self, obj):
+        if obj in self.slots:
+            self.remove(obj)
+
+    def _find(self, value):
+        # returns the lowest slot with prefix sum greater than value
+        slot = 0
+        step = 1 << (len(self.tree).bit_length() - 1)
+        while step:
+            child = slot + step
+            if child < len(self.tree) and self.tree[child] <= value:
+                slot = child
+                value -= self.tree[child]
+            step >>= 1
+        return slot + 1
+
+    def choice(self):
+        if not self.slots:
+            raise IndexError('Cannot choose from an empty sampler')
+
+        for attempt in range(2):
+            rnd = random.random() * self._prefix_sum(len(self.tree) - 1)
+            slot = self._find(rnd)
+            if slot < len(self.objects) and self.objects[slot] is not None:
+                return self.objects[slot]
+            self._rebuild()  # hit a removed slot due to rounding errors
+
+        # all weights are zero, fall back to the uniform choice
+        return random.choice(list(self.slots))
 
 
 def make_redis_connection(**kwargs):
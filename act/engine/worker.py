@@ -11,27 +11,221 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
 from oslo_config import cfg
 from oslo_log import log as logging
 import rq
 
+from act.engine import aioworker
 from act.engine import config
 from act.engine import consts
+from act.engine import metrics
+from act.engine import prometheus
+from act.engine import registry
 from act.engine import utils
 
 
 LOG = logging.getLogger(__name__)
 
 
+class CountingWorkerMixin(object):
+    # counts performed jobs in a slot of array shared between processes
+    job_counters = None
+    slot = None
+
+    def perform_job(self, *args, **kwargs):
+        result = super(CountingWorkerMixin, self).perform_job(
+            *args, **kwargs)
+        if self.job_counters is not None:
+            self.job_counters[self.slot] += 1
+        return result
+
+
+class CountingWorker(CountingWorkerMixin, rq.Worker):
+    pass
+
+
+class CountingSimpleWorker(CountingWorkerMixin, rq.SimpleWorker):
+    pass
+
+
+# rq.Worker forks a work horse for every job, rq.SimpleWorker executes
+# jobs in its own process (job timeouts are still enforced via SIGALRM)
+WORKER_CLASSES = {
+    'fork': CountingWorker,
+    'inprocess': CountingSimpleWorker,
+}
+RESTART_DELAY = 1  # seconds between worker restarts after a crash
+REPORT_INTERVAL = 10  # seconds between reports of pool throughput
+
+
+def work(queue, mode, job_counters=None, slot=None):
+    if mode == 'asyncio':
+        aioworker.work(queue, cfg.CONF.async_concurrency,
+                       cfg.CONF.async_threads, job_counters, slot)
+        return
+
+    worker_class = WORKER_CLASSES[mode]
+
+    while True:
+        try:
+            worker = worker_class([queue])
+            worker.job_counters = job_counters
+            worker.slot = slot
+            worker.work()
+            break  # normal shutdown, e.g. on SIGTERM or SIGINT
+        except Exception as e:
+            LOG.exception('Worker crashed: %s, restarting', e)
+            time.sleep(RESTART_DELAY)
+
+
+def make_job_samples(hostname, job_counters):
+    # Prometheus samples of jobs done by every worker process
+    return [prometheus.Sample('act_worker_jobs_total', 'counter',
+                              {'host': hostname, 'worker': str(slot)},
+                              count)
+            for slot, count in enumerate(job_counters)]
+
+
+class WorkerPool(object):
+    """Supervises a number of forked worker processes.
+
+    Children are forked after actions are loaded, so they share them with
+    the parent (copy-on-write). A child that exits is forked again. Number
+    of jobs done by every child is reported as workers metric.
+    """
+
+    def __init__(self, queue, mode, processes, exporter=None):
+        self.queue = queue
+        self.mode = mode
+        self.processes = processes
+        self.exporter = exporter  # serves job counters to Prometheus
+        self.children = {}  # pid -> slot
+        self.job_counters = multiprocessing.RawArray('L', processes)
+        self.reported_counters = [0] * processes
+        self.reported_at = time.time()
+        self.hostname = socket.gethostname()
+        self.running = False
+
+    def spawn(self, slot):
+        pid = os.fork()
+        if pid:  # parent
+            self.children[pid] = slot
+            LOG.info('Started worker #%s, pid: %s', slot, pid)
+            return
+
+        # child should not inherit signal handlers of the supervisor
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        if self.exporter:
+            self.exporter.close_socket()
+
+        exit_code = 0
+        try:
+            work(self.queue, self.mode, self.job_counters, slot)
+        except BaseException:
+            LOG.exception('Worker #%s failed', slot)
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def reap(self):
+        # restarts children that have exited
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                break
+
+            slot = self.children.pop(pid, None)
+            if slot is None:
+                continue
+
+            LOG.warning('Worker #%s (pid: %s) exited with status %s',
+                        slot, pid, status)
+            if self.running:
+                self.spawn(slot)
+
+    def report(self):
+        now = time.time()
+        elapsed = now - self.reported_at
+
+        for slot in range(self.processes):
+            done = self.job_counters[slot] - self.reported_counters[slot]
+            self.reported_counters[slot] = self.job_counters[slot]
+            rate = round(done / elapsed, 1)
+
+            LOG.info('Worker #%s: %s jobs/sec', slot, rate)
+            metrics.set_metric(metrics.METRIC_TYPE_WORKERS,
+                               'worker %s #%s' % (self.hostname, slot), rate)
+
+        self.reported_at = now
+
+    def stop(self, *args):
+        self.running = False
+
+    def run(self):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        if self.exporter:
+            self.exporter.add_collector(lambda: make_job_samples(
+                self.hostname, self.job_counters))
+            self.exporter.start()
+
+        for slot in range(self.processes):
+            self.spawn(slot)
+
+        while self.running:
+            time.sleep(RESTART_DELAY)
+            self.reap()
+            if time.time() - self.reported_at >= REPORT_INTERVAL:
+                self.report()
+
+        LOG.info('Stopping workers')
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+        for pid in list(self.children):
+            os.waitpid(pid, 0)
+        self.children.clear()
+
+        if self.exporter:
+            self.exporter.stop()
+
+
 def run():
-    utils.init_config_and_logging(config.ENGINE_OPTS)
+    utils.init_config_and_logging(config.WORKER_OPTS)
+
+    # load actions once, they are re-used by all jobs of in-process worker
+    # and inherited by work horses of forking worker
+    registry.init()
 
     redis_connection = utils.make_redis_connection(host=cfg.CONF.redis_host,
                                                    port=cfg.CONF.redis_port)
     with rq.Connection(redis_connection):
-        LOG.info('Connected to Redis')
+        LOG.info('Connected to Redis, worker mode: %s', cfg.CONF.mode)
         queue = rq.Queue(consts.TASK_QUEUE_NAME)
-        rq.Worker(queue).work()
+
+        exporter = None
+        if cfg.CONF.prometheus_port is not None:
+            exporter = prometheus.Exporter(cfg.CONF.prometheus_port)
+
+        if cfg.CONF.processes > 1:
+            WorkerPool(queue, cfg.CONF.mode, cfg.CONF.processes,
+                       exporter).run()
+        elif exporter:
+            job_counters = multiprocessing.RawArray('L', 1)
+            exporter.add_collector(lambda: make_job_samples(
+                socket.gethostname(), job_counters))
+            exporter.start()
+            work(queue, cfg.CONF.mode, job_counters, 0)
+        else:
+            work(queue, cfg.CONF.mode)
 
 
 if __name__ == '__main__':
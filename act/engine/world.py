@@ -12,22 +12,68 @@
 # limitations under the License.
 
 import collections
+import itertools
 
 from oslo_log import log as logging
 
+from act.engine import utils
+
 LOG = logging.getLogger(__name__)
 
 
 class World(object):
     def __init__(self):
+        # generator of item ids
+        self.id_counter = itertools.count(1)
         # item id -> item
         self.storage = {}
         # item type -> {item_id}
         self.type_to_ids = collections.defaultdict(set)
+        # item type -> {item_id}, items that can be taken as dependency
+        self.takeable_ids = collections.defaultdict(utils.IndexedSet)
+        # item type -> {item_id}, items that can be locked exclusively
+        self.lockable_ids = collections.defaultdict(utils.IndexedSet)
+        # callables notified when availability of an item type changes
+        self.listeners = []
+
+    def add_listener(self, listener):
+        # listener is called with item type when items of that type
+        # become available or unavailable for taking or locking
+        self.listeners.append(listener)
+
+    def _get_availability(self, item_type):
+        return (bool(self.takeable_ids[item_type]),
+                bool(self.lockable_ids[item_type]))
+
+    def _notify(self, item_type, availability):
+        if self._get_availability(item_type) != availability:
+            for listener in self.listeners:
+                listener(item_type)
+
+    def _update_indexes(self, item):
+        if item.can_be_taken():
+            self.takeable_ids[item.item_type].add(item.id)
+        else:
+            self.takeable_ids[item.item_type].discard(item.id)
+
+        if item.can_be_locked():
+            self.lockable_ids[item.item_type].add(item.id)
+        else:
+            self.lockable_ids[item.item_type].discard(item.id)
+
+    def _reindex(self, item):
+        # updates availability indexes after the item state is changed
+        availability = self._get_availability(item.item_type)
+        self._update_indexes(item)
+        self._notify(item.item_type, availability)
 
     def put(self, item, dependencies=None):
+        if item.id is None:
+            item.id = next(self.id_counter)
+
         self.storage[item.id] = item
         self.type_to_ids[item.item_type].add(item.id)
+        self._reindex(item)
 
         if dependencies:
             item.set_dependencies([d.id for d in dependencies])
@@ -38,10 +84,130 @@ class World(object):
         LOG.debug('Remove item from the world: %s', item)
 
         for dependency_id in item.dependencies:
-            self.storage[dependency_id].free()
+            self.free(self.storage[dependency_id])
 
+        availability = self._get_availability(item.item_type)
         self.type_to_ids[item.item_type].remove(item.id)
+        self.takeable_ids[item.item_type].discard(item.id)
+        self.lockable_ids[item.item_type].discard(item.id)
         del self.storage[item.id]
+        self._notify(item.item_type, availability)
+
+    def apply_batch(self, operations):
+        # applies changes of all operations at once, listeners are notified
+        # once per changed item type
+        new_items = []
+        deleted_ids = []
+        for operation in operations:
+            items, ids = operation.get_changes()
+            new_items.extend(items)
+            deleted_ids.extend(ids)
+
+        availability = {}  # item type -> availability before the batch
+
+        def remember(item_type):
+            if item_type not in availability:
+                availability[item_type] = self._get_availability(item_type)
+
+        # puts grouped by type
+        new_by_type = collections.defaultdict(list)
+        for item in new_items:
+            if item.id is None:
+                item.id = next(self.id_counter)
+            self.storage[item.id] = item
+            new_by_type[item.item_type].append(item)
+
+        for item_type, items in new_by_type.items():
+            remember(item_type)
+            self.type_to_ids[item_type].update(i.id for i in items)
+            for item in items:
+                self._update_indexes(item)
+
+        # pops grouped by type, dependencies are freed once per batch
+        deleted_by_type = collections.defaultdict(list)
+        freed = collections.defaultdict(int)  # dependency id -> count
+        for item_id in deleted_ids:
+            item = self.storage.pop(item_id)
+            deleted_by_type[item.item_type].append(item_id)
+            for dependency_id in item.dependencies:
+                freed[dependency_id] += 1
+
+        for item_type, ids in deleted_by_type.items():
+            remember(item_type)
+            self.type_to_ids[item_type].difference_update(ids)
+            takeable = self.takeable_ids[item_type]
+            lockable = self.lockable_ids[item_type]
+            for item_id in ids:
+                takeable.discard(item_id)
+                lockable.discard(item_id)
+
+        for dependency_id, count in freed.items():
+            dependency = self.storage.get(dependency_id)
+            if dependency is None:  # deleted within the same batch
+                continue
+            remember(dependency.item_type)
+            for _ in range(count):
+                dependency.free()
+            self._update_indexes(dependency)
+
+        for item_type, before in availability.items():
+            self._notify(item_type, before)
+
+        LOG.debug('Applied %s operations: %s items created, %s deleted, '
+                  'types changed: %s', len(operations), len(new_items),
+                  len(deleted_ids), sorted(availability))
+
+    def load_items(self, items, next_id):
+        # fills the empty world with restored items; use counts are
+        # recomputed from dependencies, so no item stays reserved
+        for item in items:
+            self.storage[item.id] = item
+            self.type_to_ids[item.item_type].add(item.id)
+
+        for item in items:
+            for dependency_id in item.dependencies:
+                self.storage[dependency_id].take()
+
+        storage = self.storage
+        for item_type, ids in self.type_to_ids.items():
+            self.takeable_ids[item_type].update(
+                i for i in ids if storage[i].can_be_taken())
+            self.lockable_ids[item_type].update(
+                i for i in ids if storage[i].can_be_locked())
+
+        self.id_counter = itertools.count(next_id)
+
+    def take(self, item):
+        item.take()
+        self._reindex(item)
+
+    def free(self, item):
+        item.free()
+        self._reindex(item)
+
+    def lock(self, item):
+        item.lock()
+        self._reindex(item)
+
+    def unlock(self, item):
+        item.unlock()
+        self._reindex(item)
+
+    def get_takeable_ids(self, item_type):
+        # ids of items of the specified type that can be taken
+        return self.takeable_ids.get(item_type)
+
+    def get_lockable_ids(self, item_type):
+        # ids of items of the specified type that can be locked
+        return self.lockable_ids.get(item_type)
+
+    def choose_takeable(self, item_type):
+        # random item of the specified type that can be taken
+        return self.storage[self.takeable_ids[item_type].choice()]
+
+    def choose_lockable(self, item_type):
+        # random item of the specified type that can be locked
+        return self.storage[self.lockable_ids[item_type].choice()]
 
     def filter_items(self, item_types):
         if item_types:
@@ -11,21 +11,80 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import fnmatch
+
 import mock
 import redis
 import rq
 import testtools
 
+from act.actions import glance as g
 from act.actions import neutron as a
+from act.actions import nova as n
 from act.engine import core
 from act.engine import world as world_pkg
 
 
+class PipelineMock(object):
+    def __init__(self, redis_mock):
+        self.redis_mock = redis_mock
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return record
+
+    def execute(self, raise_on_error=True):
+        calls, self.calls = self.calls, []
+        return [getattr(self.redis_mock, name)(*args, **kwargs)
+                for name, args, kwargs in calls]
+
+
 class StrictRedisMock(mock.MagicMock, redis.StrictRedis):
+    def __init__(self, *args, **kwargs):
+        super(StrictRedisMock, self).__init__(*args, **kwargs)
+        self.lists = collections.defaultdict(list)
+
     @classmethod
     def from_url(cls, arg, db=None, **kwargs):
         return cls()
 
+    def rpush(self, key, *values):
+        self.lists[key].extend(values)
+        return len(self.lists[key])
+
+    def lpop(self, key):
+        if self.lists[key]:
+            return self.lists[key].pop(0)
+
+    def blpop(self, keys, timeout=0):
+        value = self.lpop(keys)
+        if value is not None:
+            return keys, value
+
+    def lrange(self, key, start, end):
+        values = self.lists[key]
+        return values[start:] if end == -1 else values[start:end + 1]
+
+    def llen(self, key):
+        return len(self.lists[key])
+
+    def zcard(self, key):
+        return len(self.lists[key])
+
+    def delete(self, *keys):
+        for key in keys:
+            self.lists.pop(key, None)
+
+    def scan_iter(self, match=None):
+        return iter(fnmatch.filter(list(self.lists), match or '*'))
+
+    def pipeline(self, transaction=True):
+        return PipelineMock(self)
+
 
 class QueueMock(mock.MagicMock):
     def enqueue(self, f, *args, **kwargs):
@@ -33,6 +92,13 @@ class QueueMock(mock.MagicMock):
             return_value = f(*args, **kwargs)
         return _Item()
 
+    def prepare_data(self, f, args=None, kwargs=None, **options):
+        return f, args or (), kwargs or {}
+
+    def enqueue_many(self, job_datas):
+        return [self.enqueue(f, *args, **kwargs)
+                for f, args, kwargs in job_datas]
+
 
 class StopWatchMock(mock.MagicMock):
     def __init__(self, *args, **kw):
@@ -69,7 +135,7 @@ class RandomChoiceMock(object):
         self.timeline = timeline
         self.counter = 0
 
-    def weighted_random_choice(self, objs):
+    def choice(self, objs):
         assert self.timeline is not None
         obj_types = set(type(o) for o in objs)
         assert obj_types == set(self.timeline[self.counter]['options'])
@@ -106,10 +172,12 @@ class TestEngine(testtools.TestCase):
         rq.push_connection(StrictRedisMock())
         self.addCleanup(rq.pop_connection)
 
-        choice_patcher = mock.patch('act.engine.utils.weighted_random_choice')
+        choice_patcher = mock.patch(
+            'act.engine.utils.WeightedSampler.choice', autospec=True)
         self.choice = RandomChoiceMock()
         mock_choice = choice_patcher.start()
-        mock_choice.side_effect = self.choice.weighted_random_choice
+        mock_choice.side_effect = (
+            lambda sampler: self.choice.choice(list(sampler)))
         self.addCleanup(choice_patcher.stop)
 
         return super(TestEngine, self).setUp()
@@ -134,7 +202,8 @@ class TestEngine(testtools.TestCase):
 
         timeline = [
             {  # step 0
-                'options': [a.InitNeutronTypes],
+                'options': [a.InitNeutronTypes, g.InitGlanceTypes,
+                            n.InitNovaTypes],
                 'choice': a.InitNeutronTypes,
             },
             {  # step 1
@@ -177,7 +246,8 @@ class TestEngine(testtools.TestCase):
 
         timeline = [
             {  # step 0
-                'options': [a.InitNeutronTypes],
+                'options': [a.InitNeutronTypes, g.InitGlanceTypes,
+                            n.InitNovaTypes],
                 'choice': a.InitNeutronTypes,
             },
             {  # step 1
@@ -0,0 +1,93 @@
+# Copyright (c) 2016 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import mock
+import testtools
+
+from act.engine import actions
+from act.engine import aioworker
+from act.engine import item
+from act.engine import operations
+
+
+class AsyncCreate(actions.CreateAction):
+    async def act(self, items):
+        return item.Item('net', {'name': 'async'})
+
+
+class SyncCreate(actions.CreateAction):
+    def act(self, items):
+        return item.Item('net', {'name': 'sync'})
+
+
+class TestAsyncWorker(testtools.TestCase):
+
+    def setUp(self):
+        super(TestAsyncWorker, self).setUp()
+        self.queue = mock.MagicMock()
+        self.worker = aioworker.AsyncWorker(self.queue, 10, 2,
+                                            job_counters=[0], slot=0)
+        self.addCleanup(self.worker.executor.shutdown)
+        self.addCleanup(self.worker.dequeue_executor.shutdown)
+
+    def _perform(self, action):
+        job = mock.MagicMock(args=('data', 'pickle'), timeout=180)
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        with mock.patch('act.engine.core.load_task') as load_mock, \
+                mock.patch('act.engine.core.notify_completion') as notify:
+            load_mock.return_value = (7, action, [])
+            loop.run_until_complete(self.worker.perform(job))
+
+        return job, notify
+
+    def test_perform_coroutine(self):
+        action = AsyncCreate()
+        job, notify = self._perform(action)
+
+        operation = notify.call_args[0][0]
+        self.assertIsInstance(operation, operations.CreateOperation)
+        self.assertEqual({'name': 'async'}, operation.item.payload)
+        self.assertEqual(7, operation.task_id)
+        self.assertIsNotNone(operation.duration)
+        self.assertIs(self.queue.connection, notify.call_args[0][2])
+        job.delete.assert_called_once_with()
+        self.assertEqual([1], self.worker.job_counters)
+
+    def test_perform_sync_in_thread(self):
+        action = SyncCreate()
+        job, notify = self._perform(action)
+
+        operation = notify.call_args[0][0]
+        self.assertEqual({'name': 'sync'}, operation.item.payload)
+        self.assertIsNotNone(operation.duration)
+        job.delete.assert_called_once_with()
+
+    def test_perform_failure(self):
+        action = SyncCreate()
+        with mock.patch.object(action, 'act', side_effect=ValueError):
+            job, notify = self._perform(action)
+
+        self.assertFalse(notify.called)
+        self.assertFalse(job.delete.called)
+        registry = self.queue.failed_job_registry
+        self.assertEqual(1, registry.add.call_count)
+        self.assertEqual(job.id, registry.add.call_args[0][0].id)
+        pipe = self.queue.connection.pipeline.return_value.__enter__()
+        pipe.execute.assert_called_once_with()
+        self.assertEqual([1], self.worker.job_counters)
@@ -0,0 +1,159 @@
+# Copyright (c) 2016 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import mock
+import testtools
+
+from act.engine import actions
+from act.engine import core
+from act.engine import item as item_pkg
+from act.engine import metrics
+from act.engine import operations
+from act.engine import world as world_pkg
+
+
+class CreateNet(actions.CreateAction):
+    def act(self, items):
+        return item_pkg.Item('net', {'owner': items[0].id})
+
+
+class AsyncCreateNet(actions.CreateAction):
+    async def act(self, items):
+        await asyncio.sleep(0)
+        return item_pkg.Item('net', {'owner': items[0].id})
+
+
+class FailingCreateNet(actions.CreateAction):
+    def act(self, items):
+        raise ValueError('no more networks')
+
+
+class TestLocalExecutor(testtools.TestCase):
+
+    def setUp(self):
+        super(TestLocalExecutor, self).setUp()
+        self.executor = core.LocalExecutor(kind='thread', workers=2)
+        self.executor.start()
+        self.addCleanup(self.executor.stop)
+
+    def _submit(self, action):
+        meta = item_pkg.Item('meta_net', item_id=5)
+        task = core.Task(id=1, action=action, items=[meta])
+        with mock.patch('act.engine.registry.get_action',
+                        return_value=action):
+            self.executor.submit([task])
+            self.executor.pool.shutdown()  # wait for completion
+
+    def test_wait(self):
+        self._submit(CreateNet())
+
+        ops = self.executor.wait(1)
+        self.assertEqual(1, len(ops))
+        self.assertIsInstance(ops[0], operations.CreateOperation)
+        self.assertEqual({'owner': 5}, ops[0].item.payload)
+        self.assertEqual([5], ops[0].dependencies)
+        self.assertEqual(([], []), self.executor.harvest())
+
+    def test_wait_coroutine_action(self):
+        self._submit(AsyncCreateNet())
+
+        ops = self.executor.wait(1)
+        self.assertEqual(1, len(ops))
+        self.assertIsInstance(ops[0], operations.CreateOperation)
+        self.assertEqual({'owner': 5}, ops[0].item.payload)
+        self.assertIsNotNone(ops[0].duration)
+
+    def test_harvest_reports_failed_tasks(self):
+        self._submit(FailingCreateNet())
+
+        self.assertEqual(([], [1]), self.executor.harvest())
+        self.assertEqual(([], []), self.executor.harvest())
+        self.assertEqual({}, self.executor.task_ids)
+
+    def test_wait_timeout(self):
+        self.assertEqual([], self.executor.wait(0.01))
+
+
+class TestRQExecutor(testtools.TestCase):
+
+    @mock.patch('act.engine.core.clear_completions')
+    @mock.patch('rq.Queue')
+    def setUp(self, queue_mock, clear_mock):
+        super(TestRQExecutor, self).setUp()
+        self.registry = queue_mock.return_value.failed_job_registry
+        self.registry.get_job_ids.return_value = ['old-task']
+        self.executor = core.RQExecutor()
+        self.executor.start()
+
+        connection_patcher = mock.patch(
+            'rq.connections.get_current_connection')
+        self.pipe = connection_patcher.start().return_value.pipeline()
+        self.addCleanup(connection_patcher.stop)
+
+    def test_harvest_reads_failed_registry(self):
+        self.pipe.execute.return_value = [[], 0, 1]
+        self.assertEqual(([], []), self.executor.harvest())
+        self.pipe.zcard.assert_called_with(self.registry.key)
+
+        self.pipe.execute.return_value = [[], 0, 3]
+        self.registry.get_job_ids.return_value = ['old-task', 'task-1',
+                                                  'task-2']
+        self.assertEqual(([], ['task-1', 'task-2']), self.executor.harvest())
+
+        self.registry.get_job_ids.reset_mock()
+        self.assertEqual(([], []), self.executor.harvest())
+        self.assertFalse(self.registry.get_job_ids.called)
+
+
+class TestProcess(testtools.TestCase):
+
+    def setUp(self):
+        super(TestProcess, self).setUp()
+        self.world = world_pkg.World()
+        world_patcher = mock.patch('act.engine.world.World',
+                                   return_value=self.world)
+        world_patcher.start()
+        self.addCleanup(world_patcher.stop)
+        self.sink = metrics.MemorySink()
+
+    def _process(self, scenario, **kwargs):
+        executor = core.LocalExecutor(kind='thread', workers=2)
+        core.process(scenario, 0.01, executor=executor,
+                     metrics_sink=self.sink, **kwargs)
+
+    @mock.patch('act.actions.neutron.CreateNetwork.act',
+                side_effect=ValueError('no more networks'))
+    def test_failed_tasks_release_items(self, act):
+        scenario = {
+            'title': 'failures',
+            'play': [
+                {'duration': 0.5, 'concurrency': 1,
+                 'filter': 'InitNeutronTypes'},
+                {'duration': 0.2, 'concurrency': 2,
+                 'filter': 'CreateNetwork'},
+            ],
+        }
+        self._process(scenario)
+
+        failures = self.sink.get_all_metrics()['failures'].value
+        self.assertEqual(act.call_count, failures)
+        self.assertGreater(failures, 0)
+        self.assertEqual([], list(self.world.filter_items(['network'])))
+
+        meta_network = self.world.storage[
+            list(self.world.get_takeable_ids('meta_network'))[0]]
+        self.assertEqual(0, meta_network.use_count)
@@ -0,0 +1,70 @@
+# Copyright (c) 2016 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+
+import testtools
+
+from act.engine import export
+from act.engine import metrics
+
+
+class TestRecordWriter(testtools.TestCase):
+
+    def setUp(self):
+        super(TestRecordWriter, self).setUp()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def _play(self, path):
+        writer = export.make_writer(path)
+        writer.start()
+        writer.record(export.KIND_STAGE, 'warm up', 'start')
+        writer.write([export.make_record(export.KIND_TASK, 'CreateNet', 0.5,
+                                         'task-1', timestamp=100)])
+        writer.record_metrics({'backlog': metrics.Metric(
+            metric_type='summary', value=3, timestamp=101, mood='happy')})
+        writer.close()
+
+    def test_json_lines(self):
+        path = os.path.join(self.dir, 'run.jsonl')
+        self._play(path)
+        self._play(path)  # appends
+
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+
+        self.assertEqual(6, len(records))
+        self.assertEqual(dict(time=100, kind='task', name='CreateNet',
+                              value=0.5, detail='task-1'), records[1])
+        self.assertEqual(dict(time=101, kind='metric', name='backlog',
+                              value=3, detail='summary'), records[2])
+        self.assertEqual('stage', records[3]['kind'])
+
+    def test_csv(self):
+        path = os.path.join(self.dir, 'run.csv')
+        self._play(path)
+        self._play(path)  # appends without repeating the header
+
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+
+        self.assertEqual(6, len(rows))
+        self.assertEqual(dict(time='101', kind='metric', name='backlog',
+                              value='3', detail='summary'), rows[2])
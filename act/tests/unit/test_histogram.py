@@ -0,0 +1,70 @@
+# Copyright (c) 2016 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import testtools
+
+from act.engine import histogram
+
+
+class TestHistogram(testtools.TestCase):
+
+    def test_percentiles(self):
+        h = histogram.Histogram()
+        for i in range(1, 1001):
+            h.record(i / 1000.0)
+
+        p50, p90, p99 = h.get_percentiles()
+        self.assertAlmostEqual(0.5, p50, delta=0.5 * 0.02)
+        self.assertAlmostEqual(0.9, p90, delta=0.9 * 0.02)
+        self.assertAlmostEqual(0.99, p99, delta=0.99 * 0.02)
+        self.assertEqual(1.0, h.max)
+        self.assertEqual(1000, len(h))
+
+    def test_percentile_does_not_exceed_max(self):
+        h = histogram.Histogram()
+        h.record(0.1)
+
+        self.assertEqual(0.1, h.get_percentile(99))
+
+    def test_tiny_values(self):
+        h = histogram.Histogram()
+        h.record(0)
+        h.record(1e-9)
+
+        self.assertEqual(0, h.get_percentile(50))
+
+    def test_empty(self):
+        h = histogram.Histogram()
+
+        self.assertEqual([], h.get_percentiles())
+        self.assertIsNone(h.get_percentile(50))
+
+    def test_merge(self):
+        a = histogram.Histogram()
+        b = histogram.Histogram()
+        for i in range(100):
+            a.record(0.001)
+            b.record(1)
+
+        a.merge(b)
+
+        self.assertEqual(200, len(a))
+        self.assertEqual(1, a.max)
+        self.assertAlmostEqual(0.001, a.get_percentile(50), delta=0.00002)
+        self.assertAlmostEqual(1, a.get_percentile(90), delta=0.02)
+
+    def test_merge_different_buckets(self):
+        self.assertRaises(ValueError, histogram.Histogram().merge,
+                          histogram.Histogram(ratio=1.1))
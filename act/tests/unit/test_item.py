@@ -0,0 +1,38 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+
+import testtools
+
+from act.engine import item
+
+
+class TestItem(testtools.TestCase):
+
+    def test_compact(self):
+        one = item.Item('port')
+        other = item.Item(''.join(['po', 'rt']))
+
+        self.assertFalse(hasattr(one, '__dict__'))
+        self.assertIs(one.item_type, other.item_type)
+        self.assertIs(one.payload, other.payload)
+
+    def test_pickle(self):
+        one = item.Item('port', dict(name='foo'), use_limit=10)
+        one.set_dependencies([1, 2])
+
+        copy = pickle.loads(pickle.dumps(one, pickle.HIGHEST_PROTOCOL))
+
+        self.assertEqual(repr(one), repr(copy))
+        self.assertEqual(10, copy.use_limit)
@@ -0,0 +1,258 @@
+# Copyright (c) 2016 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import mock
+import redis
+import testtools
+
+from act.engine import metrics
+
+
+class TestMetricsBuffer(testtools.TestCase):
+    def setUp(self):
+        super(TestMetricsBuffer, self).setUp()
+
+        connection_patcher = mock.patch(
+            'rq.connections.get_current_connection')
+        self.connection = connection_patcher.start().return_value
+        self.pipe = self.connection.pipeline.return_value
+        self.addCleanup(connection_patcher.stop)
+
+    def _written(self):
+        return dict((c[0][1], json.loads(c[0][2])[1])
+                    for c in self.pipe.hset.call_args_list)
+
+    def test_flush(self):
+        buf = metrics.MetricsBuffer()
+        buf.set_metric(metrics.METRIC_TYPE_SUMMARY, 'backlog', 1)
+        buf.set_metric(metrics.METRIC_TYPE_SUMMARY, 'backlog', 2)
+        buf.set_metric(metrics.METRIC_TYPE_OBJECTS, 'network', 5)
+        buf.flush()
+
+        self.assertEqual({'backlog': 2, 'network': 5}, self._written())
+        self.assertEqual(1, self.pipe.execute.call_count)
+
+    def test_flush_drops_unchanged(self):
+        buf = metrics.MetricsBuffer()
+        buf.set_metric(metrics.METRIC_TYPE_SUMMARY, 'backlog', 1)
+        buf.set_metric(metrics.METRIC_TYPE_OBJECTS, 'network', 5)
+        buf.flush()
+        self.pipe.reset_mock()
+
+        buf.set_metric(metrics.METRIC_TYPE_SUMMARY, 'backlog', 1)
+        buf.set_metric(metrics.METRIC_TYPE_OBJECTS, 'network', 6)
+        buf.flush()
+
+        self.assertEqual({'network': 6}, self._written())
+
+    def test_flush_nothing_changed(self):
+        buf = metrics.MetricsBuffer()
+        buf.set_metric(metrics.METRIC_TYPE_SUMMARY, 'backlog', 1)
+        buf.flush()
+        self.connection.reset_mock()
+
+        buf.set_metric(metrics.METRIC_TYPE_SUMMARY, 'backlog', 1)
+        buf.flush()
+
+        self.assertFalse(self.connection.pipeline.called)
+
+    @mock.patch('time.time')
+    def test_flush_interval(self, time_mock):
+        time_mock.return_value = 100
+        buf = metrics.MetricsBuffer(flush_interval=10)
+        buf.set_metric(metrics.METRIC_TYPE_SUMMARY, 'backlog', 1)
+        buf.flush()
+        self.pipe.reset_mock()
+
+        time_mock.return_value = 105
+        buf.set_metric(metrics.METRIC_TYPE_SUMMARY, 'backlog', 2)
+        buf.flush()
+        self.assertFalse(self.pipe.execute.called)
+
+        buf.flush(force=True)
+        self.assertEqual({'backlog': 2}, self._written())
+
+    def test_flush_memory_sink(self):
+        sink = metrics.MemorySink()
+        buf = metrics.MetricsBuffer(sink=sink)
+        buf.set_metric(metrics.METRIC_TYPE_SUMMARY, 'backlog', 1)
+        buf.flush()
+
+        self.assertFalse(self.connection.pipeline.called)
+        m = sink.get_all_metrics()['backlog']
+        self.assertEqual((metrics.METRIC_TYPE_SUMMARY, 1, metrics.MOOD_HAPPY),
+                         (m.metric_type, m.value, m.mood))
+
+
+class TestTickTimer(testtools.TestCase):
+
+    @mock.patch('time.time')
+    def test_get_averages(self, time_mock):
+        timer = metrics.TickTimer()
+        for now in [(0, 0.002, 0.003), (1, 1.004, 1.009)]:
+            time_mock.return_value = now[0]
+            timer.start_tick()
+            time_mock.return_value = now[1]
+            timer.end_phase('harvest')
+            time_mock.return_value = now[2]
+            timer.end_phase('produce')
+            timer.end_tick()
+
+        averages = timer.get_averages()
+        self.assertAlmostEqual(3, averages['harvest'])
+        self.assertAlmostEqual(3, averages['produce'])
+        self.assertAlmostEqual(6, averages['tick'])
+
+    @mock.patch('time.time')
+    def test_reset_keeps_current_tick(self, time_mock):
+        timer = metrics.TickTimer()
+        time_mock.return_value = 0
+        timer.start_tick()
+        time_mock.return_value = 0.002
+        timer.end_phase('harvest')
+        timer.reset()
+        timer.end_tick()
+
+        self.assertAlmostEqual(2, timer.get_averages()['harvest'])
+        self.assertEqual(1, timer.ticks)
+
+
+class TestTimeSeries(testtools.TestCase):
+
+    def _write(self, sink, value, timestamp):
+        sink.write({'operation': metrics.Metric(
+            metric_type=metrics.METRIC_TYPE_SUMMARY, value=value,
+            timestamp=timestamp, mood=metrics.MOOD_HAPPY)})
+
+    def test_memory_sink_rollups(self):
+        sink = metrics.MemorySink(resolutions=((1, 3), (10, 3)))
+        for value, timestamp in [(1, 100.2), (2, 100.7), (3, 101.5),
+                                 (4, 103.1), (5, 105.0), (6, 111.0)]:
+            self._write(sink, value, timestamp)
+
+        self.assertEqual([(103, 4), (105, 5), (111, 6)],
+                         sink.get_series('operation', 1))
+        self.assertEqual([(100, 5), (110, 6)],
+                         sink.get_series('operation', 10))
+        self.assertEqual([], sink.get_series('backlog', 1))
+
+    @mock.patch('rq.connections.get_current_connection')
+    def test_redis_sink_rollups(self, connection_mock):
+        pipe = connection_mock.return_value.pipeline.return_value
+        sink = metrics.RedisSink(resolutions=((1, 3),))
+
+        self._write(sink, 1, 100.2)
+        self._write(sink, 2, 100.7)
+
+        key = 'act_series:1:operation'
+        pipe.rpush.assert_called_once_with(key, '[100, 1]')
+        pipe.ltrim.assert_called_once_with(key, -3, -1)
+        pipe.lset.assert_called_once_with(key, -1, '[100, 2]')
+
+    @mock.patch('rq.connections.get_current_connection')
+    def test_redis_sink_restores_missing_series(self, connection_mock):
+        pipe = connection_mock.return_value.pipeline.return_value
+        sink = metrics.RedisSink(resolutions=((1, 3),))
+        self._write(sink, 1, 100.2)
+        pipe.reset_mock()
+
+        # the series was removed after the first point was written
+        pipe.execute.return_value = [
+            1, redis.exceptions.ResponseError('no such key'), 0]
+        self._write(sink, 2, 100.7)
+
+        key = 'act_series:1:operation'
+        pipe.lset.assert_called_once_with(key, -1, '[100, 2]')
+        pipe.rpush.assert_called_once_with(key, '[100, 2]')
+        pipe.ltrim.assert_called_once_with(key, -3, -1)
+
+    @mock.patch('rq.connections.get_current_connection')
+    def test_redis_sink_raises_other_errors(self, connection_mock):
+        pipe = connection_mock.return_value.pipeline.return_value
+        sink = metrics.RedisSink(resolutions=((1, 3),))
+
+        pipe.execute.return_value = [
+            redis.exceptions.ResponseError('wrong type'), 1, 1, 0]
+        self.assertRaises(redis.exceptions.ResponseError,
+                          self._write, sink, 1, 100.2)
+
+    def test_get_rate(self):
+        self.assertEqual(2.5, metrics.get_rate([(10, 5), (11, 6), (14, 15)]))
+        self.assertIsNone(metrics.get_rate([(10, 5)]))
+
+    @mock.patch('rq.connections.get_current_connection')
+    def test_redis_sink_publishes_updates(self, connection_mock):
+        pipe = connection_mock.return_value.pipeline.return_value
+        sink = metrics.RedisSink(resolutions=())
+
+        self._write(sink, 1, 100.2)
+
+        channel, data = pipe.publish.call_args[0]
+        self.assertEqual(metrics.CHANNEL_METRICS, channel)
+        self.assertEqual({'operation': ['summary', 1, 100.2, 'happy']},
+                         json.loads(data))
+
+
+class TestMetricsView(testtools.TestCase):
+
+    def setUp(self):
+        super(TestMetricsView, self).setUp()
+
+        connection_patcher = mock.patch(
+            'rq.connections.get_current_connection')
+        self.connection = connection_patcher.start().return_value
+        self.addCleanup(connection_patcher.stop)
+
+        self.connection.hgetall.return_value = {
+            b'backlog': json.dumps(['summary', 3, 99.0, 'happy'])}
+        self.connection.lrange.return_value = [json.dumps([99, 10])]
+        self.pubsub = self.connection.pubsub.return_value
+
+    def _message(self, updates):
+        return dict(type='message', data=json.dumps(updates))
+
+    @mock.patch('time.time', mock.Mock(return_value=101))
+    def test_update(self):
+        view = metrics.MetricsView(tracked=['operation'])
+        self.assertEqual(3, view.metrics['backlog'].value)
+
+        self.pubsub.get_message.side_effect = [
+            self._message({'operation': ['summary', 20, 100.5, 'happy']}),
+            self._message({'backlog': ['summary', 0, 100.6, 'happy']}),
+            None]
+
+        self.assertTrue(view.update(1))
+        self.assertEqual(20, view.metrics['operation'].value)
+        self.assertEqual(0, view.metrics['backlog'].value)
+        self.assertEqual([(99, 10), (100.5, 20)],
+                         view.get_history('operation'))
+        self.assertEqual(1, self.connection.hgetall.call_count)
+
+    def test_update_timeout(self):
+        view = metrics.MetricsView()
+        self.pubsub.get_message.return_value = None
+
+        self.assertFalse(view.update(1))
+        self.pubsub.get_message.assert_called_once_with(timeout=1)
+
+    def test_update_cleared(self):
+        view = metrics.MetricsView()
+        self.connection.hgetall.return_value = {}
+        self.pubsub.get_message.side_effect = [self._message(None), None]
+
+        self.assertTrue(view.update(1))
+        self.assertEqual({}, view.metrics)
@@ -0,0 +1,57 @@
+# Copyright (c) 2016 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import six
+import testtools
+
+from act.engine import monitor
+
+
+class TestScreen(testtools.TestCase):
+
+    def test_place(self):
+        canvas = monitor.Canvas(10, 3)
+        monitor.place(canvas, 'abc\nde', 2, 1)
+        monitor.place(canvas, 'xyz0123456789', 4, 2)
+
+        self.assertEqual(['', '  abc', '  dexyz012'], canvas)
+
+    def test_render_changed_lines_only(self):
+        stream = six.StringIO()
+        screen = monitor.Screen(stream)
+
+        screen.render(['one', 'two', 'three'])
+        self.assertTrue(stream.getvalue().startswith(monitor.CLEAR_SCREEN))
+        stream.truncate(0)
+        stream.seek(0)
+
+        screen.render(['one', '2', 'three'])
+        self.assertEqual(monitor.MOVE_CURSOR % 2 + '2' +
+                         monitor.RESET_STYLE + monitor.CLEAR_LINE,
+                         stream.getvalue())
+        stream.truncate(0)
+        stream.seek(0)
+
+        screen.render(['one', '2', 'three'])
+        self.assertEqual('', stream.getvalue())
+
+    def test_render_resized(self):
+        stream = six.StringIO()
+        screen = monitor.Screen(stream)
+        screen.render(['one'])
+
+        screen.render(['one', 'two'])
+
+        self.assertEqual(2, stream.getvalue().count(monitor.CLEAR_SCREEN))
@@ -0,0 +1,80 @@
+# Copyright (c) 2016 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from six.moves.urllib import error as urllib_error
+from six.moves.urllib import request as urllib_request
+import testtools
+
+from act.engine import metrics
+from act.engine import prometheus
+
+
+def make_metric(metric_type, value):
+    return metrics.Metric(metric_type=metric_type, value=value,
+                          timestamp=100, mood=metrics.MOOD_HAPPY)
+
+
+class TestExporter(testtools.TestCase):
+
+    def setUp(self):
+        super(TestExporter, self).setUp()
+        self.exporter = prometheus.Exporter(0, host='127.0.0.1')
+        self.exporter.start()
+        self.addCleanup(self.exporter.stop)
+
+    def _scrape(self, path='/metrics'):
+        url = 'http://127.0.0.1:%s%s' % (self.exporter.port, path)
+        return urllib_request.urlopen(url, timeout=5)
+
+    def test_scrape(self):
+        self.exporter.update({
+            'backlog': make_metric(metrics.METRIC_TYPE_SUMMARY, 3),
+            'CreateNet': make_metric(metrics.METRIC_TYPE_ACTIONS, 5),
+            'engine.tick_ms': make_metric(metrics.METRIC_TYPE_ENGINE, 2.5),
+            'latency.CreateNet.p99_ms': make_metric(
+                metrics.METRIC_TYPE_LATENCY, 120),
+            'stage.warm up.max_ms': make_metric(
+                metrics.METRIC_TYPE_LATENCY, 250),
+        })
+        self.exporter.add_collector(lambda: [prometheus.Sample(
+            'act_worker_jobs_total', 'counter', {'worker': '0'}, 7)])
+
+        response = self._scrape()
+        body = response.read().decode('utf-8')
+
+        self.assertEqual(prometheus.CONTENT_TYPE,
+                         response.headers['Content-Type'])
+        self.assertEqual([
+            '# TYPE act_action_latency_seconds gauge',
+            'act_action_latency_seconds{action="CreateNet",'
+            'quantile="0.99"} 0.12',
+            '# TYPE act_actions gauge',
+            'act_actions{name="CreateNet"} 5.0',
+            '# TYPE act_engine_phase_seconds gauge',
+            'act_engine_phase_seconds{phase="tick"} 0.0025',
+            '# TYPE act_stage_latency_seconds gauge',
+            'act_stage_latency_seconds{quantile="1",stage="warm up"} 0.25',
+            '# TYPE act_summary gauge',
+            'act_summary{name="backlog"} 3.0',
+            '# TYPE act_worker_jobs_total counter',
+            'act_worker_jobs_total{worker="0"} 7.0',
+        ], body.splitlines())
+
+    def test_not_found(self):
+        e = self.assertRaises(urllib_error.HTTPError, self._scrape, '/')
+        self.assertEqual(404, e.code)
+
+    def test_escape(self):
+        self.assertEqual('a\\"b\\\\c\\n', prometheus.escape('a"b\\c\n'))
@@ -0,0 +1,90 @@
+# Copyright (c) 2016 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import testtools
+
+from act.engine import actions
+from act.engine import item
+from act.engine import readiness
+from act.engine import world
+
+
+class CreateSubnet(actions.CreateAction):
+    depends_on = {'net', 'meta_subnet'}
+
+
+class DeleteNet(actions.DeleteAction):
+    depends_on = {'net'}
+
+
+class TestReadinessCache(testtools.TestCase):
+    def setUp(self):
+        super(TestReadinessCache, self).setUp()
+        self.world = world.World()
+        self.create_subnet = CreateSubnet()
+        self.delete_net = DeleteNet()
+        self.cache = readiness.ReadinessCache(
+            self.world, [self.create_subnet, self.delete_net])
+        self.cache.enable([self.create_subnet, self.delete_net])
+
+    def _ready(self):
+        self.cache.refresh()
+        return set(self.cache.sampler)
+
+    def test_not_ready_until_all_types_available(self):
+        self.assertEqual(set(), self._ready())
+        self.assertIsNone(self.cache.choose())
+
+        net = item.Item('net')
+        self.world.put(net)
+        self.assertEqual({self.delete_net}, self._ready())
+        self.assertEqual(self.delete_net, self.cache.choose())
+
+        meta = item.Item('meta_subnet')
+        self.world.put(meta)
+        self.assertEqual({self.create_subnet, self.delete_net},
+                         self._ready())
+        candidates = self.cache.candidates[self.create_subnet]
+        self.assertEqual({'net': {net.id}, 'meta_subnet': {meta.id}},
+                         dict((k, set(v)) for k, v in candidates.items()))
+
+    def test_lock_and_take(self):
+        net = item.Item('net', use_limit=1)
+        self.world.put(net)
+        self.world.put(item.Item('meta_subnet'))
+
+        self.world.lock(net)
+        self.assertEqual(set(), self._ready())
+
+        self.world.unlock(net)
+        self.world.take(net)
+        self.assertEqual(set(), self._ready())
+
+        self.world.free(net)
+        self.assertEqual({self.create_subnet, self.delete_net},
+                         self._ready())
+
+        self.world.pop(net)
+        self.assertEqual(set(), self._ready())
+
+    def test_only_invalidated_actions_are_checked(self):
+        self.world.put(item.Item('net'))
+        self._ready()
+
+        self.world.put(item.Item('net'))  # net is already available
+        self.assertEqual(set(), self.cache.dirty)
+
+        self.world.put(item.Item('meta_subnet'))
+        self.assertEqual({self.create_subnet}, self.cache.dirty)
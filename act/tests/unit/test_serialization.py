@@ -0,0 +1,93 @@
+# Copyright (c) 2016 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import testtools
+
+from act.engine import item
+from act.engine import operations
+from act.engine import serialization
+
+
+class SerializerTestMixin(object):
+    serializer_name = None
+
+    def setUp(self):
+        super(SerializerTestMixin, self).setUp()
+        self.serializer = serialization.get_serializer(self.serializer_name)
+
+    def _round_trip(self, operation):
+        data = self.serializer.dump_operation(operation)
+        return self.serializer.load_operation(data)
+
+    def test_task(self):
+        message = ('task-id', 'CreatePort',
+                   [(1, 'network', {'id': '1234'}), (2, 'meta_port', {})])
+
+        data = self.serializer.dump_task(message)
+
+        self.assertEqual(message, self.serializer.load_task(data))
+
+    def test_noop_operation(self):
+        observed = self._round_trip(operations.Operation('task-id'))
+
+        self.assertIs(operations.Operation, type(observed))
+        self.assertEqual('task-id', observed.task_id)
+
+    def test_create_operation(self):
+        new_item = item.Item('port', {'name': 'foo'}, use_limit=10)
+
+        observed = self._round_trip(operations.CreateOperation(
+            item=new_item, dependencies=[1, 2], task_id='task-id'))
+
+        self.assertIsInstance(observed, operations.CreateOperation)
+        self.assertEqual('task-id', observed.task_id)
+        self.assertEqual([1, 2], list(observed.dependencies))
+        self.assertEqual(repr(new_item), repr(observed.item))
+        self.assertEqual(10, observed.item.use_limit)
+
+    def test_batch_create_operation(self):
+        new_items = [item.Item('meta_network'),
+                     item.Item('flavor', {'id': '9999'}, read_only=True)]
+
+        observed = self._round_trip(operations.BatchCreateOperation(
+            new_items=new_items, dependencies=[1], task_id='task-id'))
+
+        self.assertIsInstance(observed, operations.BatchCreateOperation)
+        self.assertEqual([1], list(observed.dependencies))
+        self.assertEqual([repr(i) for i in new_items],
+                         [repr(i) for i in observed.new_items])
+        self.assertTrue(observed.new_items[1].read_only)
+
+    def test_delete_operation(self):
+        observed = self._round_trip(operations.DeleteOperation(
+            item_id=5, task_id='task-id'))
+
+        self.assertIsInstance(observed, operations.DeleteOperation)
+        self.assertEqual(5, observed.item_id)
+
+    def test_operation_duration(self):
+        operation = operations.DeleteOperation(item_id=5, task_id='task-id')
+        self.assertIsNone(self._round_trip(operation).duration)
+
+        operation.duration = 0.25
+        self.assertEqual(0.25, self._round_trip(operation).duration)
+
+
+class TestPickleSerializer(SerializerTestMixin, testtools.TestCase):
+    serializer_name = 'pickle'
+
+
+class TestMsgpackSerializer(SerializerTestMixin, testtools.TestCase):
+    serializer_name = 'msgpack'
@@ -0,0 +1,180 @@
+# Copyright (c) 2016 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import tempfile
+import time
+
+import mock
+import msgpack
+import testtools
+
+from act.engine import core
+from act.engine import item
+from act.engine import metrics
+from act.engine import snapshot
+from act.engine import world
+
+
+class CrashingExecutor(core.Executor):
+    # never completes tasks, fails after the specified number of ticks
+    def __init__(self, ticks):
+        super(CrashingExecutor, self).__init__()
+        self.ticks = ticks
+
+    def submit(self, tasks):
+        pass
+
+    def harvest(self):
+        self.ticks -= 1
+        if self.ticks < 0:
+            raise RuntimeError('engine is killed')
+        return [], []
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return []
+
+
+class TestSnapshot(testtools.TestCase):
+
+    def setUp(self):
+        super(TestSnapshot, self).setUp()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'world.snapshot')
+
+    def test_save_and_load(self):
+        globe = world.World()
+        root = item.Item('root')
+        globe.put(root)
+        net = item.Item('net', {'id': 'net-1'}, use_limit=2)
+        globe.put(net, [root])
+        subnet = item.Item('subnet', {'cidr': '10.0.0.0/24'})
+        globe.put(subnet, [net])
+        port = item.Item('port', read_only=True)
+        globe.put(port, [net, subnet])
+
+        snapshot.save(globe, self.path, dict(stage=1, operations=3))
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+        restored, state = snapshot.load(self.path)
+
+        self.assertEqual(dict(stage=1, operations=3), state)
+        self.assertEqual(globe.get_counters(), restored.get_counters())
+
+        restored_port = restored.storage[port.id]
+        self.assertEqual('port', restored_port.item_type)
+        self.assertTrue(restored_port.read_only)
+        self.assertEqual((net.id, subnet.id), restored_port.dependencies)
+        self.assertEqual({'cidr': '10.0.0.0/24'},
+                         restored.storage[subnet.id].payload)
+
+        # net is used by both subnet and port, so reached its limit
+        restored_net = restored.storage[net.id]
+        self.assertEqual(2, restored_net.use_count)
+        self.assertEqual(0, len(restored.get_takeable_ids('net')))
+        self.assertNotIn(net.id, restored.get_lockable_ids('net'))
+        self.assertEqual([port.id], list(restored.get_takeable_ids('port')))
+        self.assertNotIn(port.id, restored.get_lockable_ids('port'))
+
+        # ids of new items continue the sequence of the saved world
+        self.assertEqual(next(globe.id_counter), next(restored.id_counter))
+
+    def test_reservations_are_released(self):
+        globe = world.World()
+        net = item.Item('net', use_limit=1)
+        globe.put(net)
+        globe.take(net)  # reserved by a task that was running
+        subnet = item.Item('subnet')
+        globe.put(subnet)
+        globe.lock(subnet)
+
+        snapshot.save(globe, self.path)
+        restored, state = snapshot.load(self.path)
+
+        self.assertEqual({}, state)
+        self.assertEqual([net.id], list(restored.get_takeable_ids('net')))
+        self.assertEqual([subnet.id],
+                         list(restored.get_lockable_ids('subnet')))
+
+    def test_unsupported_version(self):
+        with open(self.path, 'wb') as f:
+            f.write(msgpack.packb(dict(version=0)))
+
+        self.assertRaises(ValueError, snapshot.load, self.path)
+
+
+class TestResume(testtools.TestCase):
+
+    def setUp(self):
+        super(TestResume, self).setUp()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'world.snapshot')
+
+    def _make_scenario(self, duration):
+        return {
+            'title': 'resume',
+            'play': [{'duration': duration, 'concurrency': 3,
+                      'filter': 'Init.*'}],
+        }
+
+    def test_resume_after_crash(self):
+        snapshotter = snapshot.Snapshotter(self.path, interval=0)
+        self.assertRaises(RuntimeError, core.process,
+                          self._make_scenario(10), 0.01,
+                          executor=CrashingExecutor(3),
+                          metrics_sink=metrics.MemorySink(),
+                          snapshotter=snapshotter)
+        snapshotter.wait()
+
+        restored, state = snapshot.load(self.path)
+        self.assertEqual(0, state['stage'])
+        # init tasks were running, they are lost and not counted
+        self.assertEqual({'InitNeutronTypes': 0, 'InitGlanceTypes': 0,
+                          'InitNovaTypes': 0}, state['actions'])
+        self.assertEqual({'root': 1}, restored.get_counters())
+
+        resumed = world.World()
+        with mock.patch('act.engine.world.World', return_value=resumed):
+            core.process(self._make_scenario(0.5), 0.01,
+                         executor=core.LocalExecutor(kind='thread'),
+                         metrics_sink=metrics.MemorySink(),
+                         resume_from=self.path)
+
+        counters = resumed.get_counters()
+        for item_type in ('meta_network', 'meta_image', 'meta_server'):
+            self.assertEqual(1, counters[item_type])
+
+    def test_stage_elapsed_accumulates(self):
+        elapsed = []
+        for i in range(3):
+            snapshotter = snapshot.Snapshotter(self.path, interval=0)
+            self.assertRaises(RuntimeError, core.process,
+                              self._make_scenario(10), 0.05,
+                              executor=CrashingExecutor(3),
+                              metrics_sink=metrics.MemorySink(),
+                              snapshotter=snapshotter,
+                              resume_from=self.path if i else None)
+            snapshotter.wait()
+
+            restored, state = snapshot.load(self.path)
+            self.assertEqual(0, state['stage'])
+            elapsed.append(state['stage_elapsed'])
+
+        # every run plays the stage for at least 2 waits of 0.05 seconds
+        self.assertGreater(elapsed[1] - elapsed[0], 0.09)
+        self.assertGreater(elapsed[2] - elapsed[1], 0.09)
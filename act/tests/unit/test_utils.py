@@ -111,26 +111,85 @@ class TestUtils(testtools.TestCase):
                          utils.strict('Some 01-string (brr!) + %% A'))
 
     @mock.patch('random.random')
-    def test_weighted_random_choice(self, mock_random):
-        class _ItemWithWeight(object):
-            def __init__(self, value, weight):
-                self.value = value
-                self.weight = weight
-
-        items = [
-            _ItemWithWeight('abc', 0.1),
-            _ItemWithWeight('def', 0.3),
-            _ItemWithWeight('klm', 0.6),
-        ]
+    def test_weighted_sampler_choice(self, mock_random):
+        sampler = utils.WeightedSampler()
+        sampler.add('abc', 0.1)
+        sampler.add('def', 0.3)
+        sampler.add('klm', 0.6)
 
         mock_random.return_value = 0.05
-        observed = utils.weighted_random_choice(items)
-        self.assertEqual('abc', observed.value)
+        self.assertEqual('abc', sampler.choice())
 
         mock_random.return_value = 0.25
-        observed = utils.weighted_random_choice(items)
-        self.assertEqual('def', observed.value)
+        self.assertEqual('def', sampler.choice())
 
         mock_random.return_value = 0.5
-        observed = utils.weighted_random_choice(items)
-        self.assertEqual('klm', observed.value)
+        self.assertEqual('klm', sampler.choice())
+
+        sampler.remove('def')  # the rest is [0.1 abc, 0.6 klm]
+        self.assertEqual({'abc', 'klm'}, set(sampler))
+
+        mock_random.return_value = 0.1
+        self.assertEqual('abc', sampler.choice())
+
+        mock_random.return_value = 0.2
+        self.assertEqual('klm', sampler.choice())
+
+    @mock.patch('random.random')
+    def test_weighted_sampler_reuses_slots(self, mock_random):
+        sampler = utils.WeightedSampler()
+        for i in range(10):
+            sampler.add(i, 1)
+        for i in range(0, 10, 2):
+            sampler.remove(i)
+        sampler.add('x', 5)
+
+        self.assertEqual(6, len(sampler))
+        self.assertEqual(11, len(sampler.tree))
+
+        mock_random.return_value = 0.99
+        self.assertEqual(9, sampler.choice())
+
+        mock_random.return_value = 0.0
+        self.assertEqual(1, sampler.choice())
+
+        mock_random.return_value = 0.45
+        self.assertEqual('x', sampler.choice())  # took slot of 8
+
+    def test_weighted_sampler_distribution(self):
+        sampler = utils.WeightedSampler()
+        for i in range(100):
+            sampler.add(i, 1.0 if i % 2 else 0.1)
+        for i in range(0, 100, 4):
+            sampler.discard(i)
+
+        for i in range(1000):
+            chosen = sampler.choice()
+            self.assertIn(chosen, sampler)
+
+    def test_weighted_sampler_empty(self):
+        sampler = utils.WeightedSampler()
+        self.assertRaises(IndexError, sampler.choice)
+
+    def test_indexed_set(self):
+        s = utils.IndexedSet([1, 2, 3])
+        s.add(2)
+        self.assertEqual([1, 2, 3], s.elements)
+
+        s.remove(1)  # 3 is moved into position of 1
+        self.assertEqual([3, 2], s.elements)
+        self.assertEqual({3: 0, 2: 1}, s.positions)
+
+        s.remove(2)
+        s.discard(2)
+        self.assertEqual([3], list(s))
+        self.assertNotIn(2, s)
+        self.assertEqual(3, s.choice())
+
+        s.remove(3)
+        self.assertEqual(0, len(s))
+        self.assertRaises(KeyError, s.remove, 3)
+
+        s.update([4, 5, 4])
+        self.assertEqual([4, 5], s.elements)
+        self.assertEqual({4: 0, 5: 1}, s.positions)
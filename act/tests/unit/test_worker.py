@@ -0,0 +1,95 @@
+# Copyright (c) 2016 OpenStack Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+import testtools
+
+from act.engine import worker
+
+
+class TestWorker(testtools.TestCase):
+
+    def test_work_inprocess(self):
+        worker_class = mock.MagicMock()
+        with mock.patch.dict(worker.WORKER_CLASSES,
+                             {'inprocess': worker_class}):
+            worker.work('queue', 'inprocess')
+
+        worker_class.assert_called_once_with(['queue'])
+        worker_class.return_value.work.assert_called_once_with()
+
+    @mock.patch('time.sleep')
+    def test_work_restarts_after_crash(self, sleep_mock):
+        worker_class = mock.MagicMock()
+        worker_class.return_value.work.side_effect = [
+            ValueError('crash'), None]
+        with mock.patch.dict(worker.WORKER_CLASSES, {'fork': worker_class}):
+            worker.work('queue', 'fork')
+
+        self.assertEqual(2, worker_class.return_value.work.call_count)
+        sleep_mock.assert_called_once_with(worker.RESTART_DELAY)
+
+
+class TestWorkerPool(testtools.TestCase):
+
+    @mock.patch('os.waitpid')
+    def test_reap_restarts_exited(self, waitpid_mock):
+        pool = worker.WorkerPool('queue', 'inprocess', 2)
+        pool.running = True
+        pool.children = {101: 0, 102: 1}
+        waitpid_mock.side_effect = [(102, 256), (0, 0)]
+
+        with mock.patch.object(pool, 'spawn') as spawn_mock:
+            pool.reap()
+
+        spawn_mock.assert_called_once_with(1)
+        self.assertEqual({101: 0}, pool.children)
+
+    @mock.patch('os.waitpid')
+    def test_reap_does_not_restart_when_stopped(self, waitpid_mock):
+        pool = worker.WorkerPool('queue', 'inprocess', 1)
+        pool.children = {101: 0}
+        waitpid_mock.side_effect = [(101, 0)]
+
+        with mock.patch.object(pool, 'spawn') as spawn_mock:
+            pool.reap()
+
+        self.assertFalse(spawn_mock.called)
+        self.assertEqual({}, pool.children)
+
+    @mock.patch('act.engine.metrics.set_metric')
+    @mock.patch('time.time')
+    def test_report(self, time_mock, set_metric_mock):
+        time_mock.return_value = 100
+        pool = worker.WorkerPool('queue', 'inprocess', 2)
+        pool.hostname = 'host'
+
+        pool.job_counters[0] = 20
+        pool.job_counters[1] = 5
+        time_mock.return_value = 110
+        pool.report()
+
+        set_metric_mock.assert_has_calls([
+            mock.call('workers', 'worker host #0', 2.0),
+            mock.call('workers', 'worker host #1', 0.5),
+        ])
+        self.assertEqual([20, 5], pool.reported_counters)
+
+    def test_make_job_samples(self):
+        samples = worker.make_job_samples('host', [3, 4])
+
+        self.assertEqual([({'host': 'host', 'worker': '0'}, 3),
+                          ({'host': 'host', 'worker': '1'}, 4)],
+                         [(s.labels, s.value) for s in samples])
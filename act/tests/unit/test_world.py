@@ -14,6 +14,7 @@
 import testtools
 
 from act.engine import item
+from act.engine import operations
 from act.engine import world
 
 
@@ -29,3 +30,116 @@ class TestWorld(testtools.TestCase):
         globe.put(rect, [angle])
 
         self.assertEqual(angle.id, rect.dependencies[0])
+
+    def test_availability_indexes(self):
+        globe = world.World()
+        net = item.Item('net', use_limit=2)
+        globe.put(net)
+
+        self.assertEqual({net.id}, set(globe.get_takeable_ids('net')))
+        self.assertEqual({net.id}, set(globe.get_lockable_ids('net')))
+
+        globe.take(net)
+        self.assertEqual({net.id}, set(globe.get_takeable_ids('net')))
+        self.assertEqual(set(), set(globe.get_lockable_ids('net')))
+
+        globe.take(net)
+        self.assertEqual(set(), set(globe.get_takeable_ids('net')))
+
+        globe.free(net)
+        globe.free(net)
+        self.assertEqual({net.id}, set(globe.get_takeable_ids('net')))
+        self.assertEqual({net.id}, set(globe.get_lockable_ids('net')))
+
+        globe.lock(net)
+        self.assertEqual(set(), set(globe.get_takeable_ids('net')))
+        self.assertEqual(set(), set(globe.get_lockable_ids('net')))
+
+        globe.unlock(net)
+        self.assertEqual({net.id}, set(globe.get_lockable_ids('net')))
+
+    def test_availability_indexes_read_only(self):
+        globe = world.World()
+        image = item.Item('image', read_only=True)
+        globe.put(image)
+
+        self.assertEqual({image.id}, set(globe.get_takeable_ids('image')))
+        self.assertEqual(set(), set(globe.get_lockable_ids('image')))
+
+    def test_pop_frees_dependencies(self):
+        globe = world.World()
+        net = item.Item('net', use_limit=1)
+        globe.put(net)
+        globe.take(net)
+
+        subnet = item.Item('subnet')
+        globe.put(subnet, [net])
+        self.assertEqual(set(), set(globe.get_takeable_ids('net')))
+
+        globe.lock(subnet)
+        globe.pop(subnet)
+
+        self.assertEqual({net.id}, set(globe.get_takeable_ids('net')))
+        self.assertEqual(set(), set(globe.get_takeable_ids('subnet')))
+        self.assertEqual({'net': 1, 'subnet': 0}, globe.get_counters())
+
+    def test_choose(self):
+        globe = world.World()
+        net = item.Item('net')
+        globe.put(net)
+        image = item.Item('image', read_only=True)
+        globe.put(image)
+
+        self.assertEqual(net, globe.choose_takeable('net'))
+        self.assertEqual(net, globe.choose_lockable('net'))
+        self.assertEqual(image, globe.choose_takeable('image'))
+        self.assertRaises(IndexError, globe.choose_lockable, 'image')
+
+    def test_put_assigns_ids(self):
+        globe = world.World()
+        first = item.Item('net')
+        second = item.Item('net')
+        self.assertIsNone(first.id)
+
+        globe.put(first)
+        globe.put(second)
+
+        self.assertEqual(1, first.id)
+        self.assertEqual(2, second.id)
+        self.assertEqual({1: first, 2: second}, globe.storage)
+
+    def test_apply_batch(self):
+        globe = world.World()
+        net = item.Item('net', use_limit=2)
+        globe.put(net)
+        globe.take(net)
+        globe.take(net)
+        subnet = item.Item('subnet')
+        globe.put(subnet, [net])
+        globe.lock(subnet)
+
+        notified = []
+        globe.add_listener(notified.append)
+
+        new_subnets = [item.Item('subnet'), item.Item('subnet')]
+        globe.apply_batch([
+            operations.DeleteOperation(item_id=subnet.id, task_id=1),
+            operations.CreateOperation(item=new_subnets[0],
+                                       dependencies=[net.id], task_id=2),
+            operations.BatchCreateOperation(
+                new_items=new_subnets[1:] + [item.Item('port')],
+                dependencies=[net.id], task_id=3),
+            operations.Operation(task_id=4),
+        ])
+
+        self.assertNotIn(subnet.id, globe.storage)
+        self.assertEqual({'net': 1, 'subnet': 2, 'port': 1},
+                         globe.get_counters())
+        self.assertEqual(set(i.id for i in new_subnets),
+                         set(globe.get_lockable_ids('subnet')))
+        self.assertEqual((net.id,), new_subnets[0].dependencies)
+        # one of two references is freed by the deleted subnet
+        self.assertEqual(1, net.use_count)
+        self.assertEqual({net.id}, set(globe.get_takeable_ids('net')))
+        # each type is notified once: net and subnet got available
+        self.assertEqual(['net', 'port', 'subnet'], sorted(notified))
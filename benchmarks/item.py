@@ -0,0 +1,85 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Memory footprint of world items.
+
+Run with asv or directly: python -m benchmarks.item [number of items]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from act.engine import item as item_pkg
+from act.engine import world as world_pkg
+
+
+def make_payload(i):
+    return dict(name='port-%d' % i, id='%032x' % i)
+
+
+def measure(n, with_world=True, with_payload=False):
+    # returns number of bytes allocated per item
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    items = []
+    world = world_pkg.World()
+    meta = item_pkg.Item('meta_port')
+    world.put(meta)
+
+    for i in range(n):
+        payload = make_payload(i) if with_payload else None
+        one = item_pkg.Item('port', payload, use_limit=10)
+        if with_world:
+            world.put(one, [meta])
+        else:
+            items.append(one)
+
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return float(allocated) / n
+
+
+class ItemMemorySuite(object):
+    params = [1000, 100000, 1000000]
+    param_names = ['items']
+    timeout = 600
+
+    def track_bytes_per_item(self, n):
+        return measure(n, with_world=False)
+    track_bytes_per_item.unit = 'bytes'
+
+    def track_bytes_per_world_item(self, n):
+        return measure(n)
+    track_bytes_per_world_item.unit = 'bytes'
+
+    def track_bytes_per_world_item_with_payload(self, n):
+        return measure(n, with_payload=True)
+    track_bytes_per_world_item_with_payload.unit = 'bytes'
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print('Items: %d' % n)
+    print('Bytes per item: %.1f' % measure(n, with_world=False))
+    print('Bytes per item in world: %.1f' % measure(n))
+    print('Bytes per item in world with payload: %.1f' %
+          measure(n, with_payload=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Throughput and latency of the engine scheduling loop.
+
+Synthetic worlds of N items are played by synthetic registries of M
+actions with zero-latency act(). Types form neutron.yaml-like chains:
+creation of an item takes an item of the parent type, deletion locks
+an item of its own type. Tasks are completed right after they are
+produced, so only the engine side is measured: choice of actions and
+items, reservation and handling of operations. Latency per task is the
+time spent in produce_tasks and apply_batch, act() is not included.
+
+Run with asv or directly: python -m benchmarks.scheduler [items] [actions]
+"""
+
+import collections
+import gc
+import sys
+import time
+import tracemalloc
+
+from act.engine import actions as actions_pkg
+from act.engine import core
+from act.engine import item as item_pkg
+from act.engine import readiness as readiness_pkg
+from act.engine import world as world_pkg
+
+CHAIN_DEPTH = 5
+CONCURRENCY = 100
+TASKS = 10000
+
+
+def make_types(chains):
+    # item types of every chain, the first type depends on the root
+    return [['type_%d_%d' % (chain, level) for level in range(CHAIN_DEPTH)]
+            for chain in range(chains)]
+
+
+def make_actions(n):
+    # n create and delete actions spread over chains of item types
+    chains = make_types(max(1, n // (2 * CHAIN_DEPTH)))
+    result = []
+    for i in range(n):
+        chain = chains[(i // 2) // CHAIN_DEPTH % len(chains)]
+        level = (i // 2) % CHAIN_DEPTH
+        item_type = chain[level]
+        if i % 2 == 0:
+            parent = chain[level - 1] if level else 'root'
+            result.append(make_create_action(i, item_type, parent))
+        else:
+            result.append(make_delete_action(i, item_type))
+    return result
+
+
+def make_create_action(i, item_type, parent):
+    def act(self, items):
+        return item_pkg.Item(item_type, use_limit=10)
+
+    return type('Create_%d' % i, (actions_pkg.CreateAction,),
+                dict(depends_on={parent}, act=act))()
+
+
+def make_delete_action(i, item_type):
+    def act(self, items):
+        pass
+
+    return type('Delete_%d' % i, (actions_pkg.DeleteAction,),
+                dict(depends_on={item_type}, act=act))()
+
+
+def make_world(n, actions):
+    # world with the root and n items spread over types of the actions
+    world = world_pkg.World()
+    world.put(item_pkg.Item('root'))
+
+    item_types = set(t for a in actions for t in a.get_depends_on())
+    item_types = sorted(item_types - {'root'})
+    for i in range(n):
+        world.put(item_pkg.Item(item_types[i % len(item_types)],
+                                use_limit=10))
+    return world
+
+
+class Scheduler(object):
+    def __init__(self, n_items, n_actions):
+        self.actions = make_actions(n_actions)
+        self.world = make_world(n_items, self.actions)
+        self.readiness = readiness_pkg.ReadinessCache(self.world,
+                                                      self.actions)
+        self.actions_counter = collections.defaultdict(int)
+        # seconds spent in producing tasks and applying their operations,
+        # i.e. in the engine rather than in actions
+        self.scheduling_time = 0
+        self.completed = 0
+
+    def tick(self, n):
+        # produces up to n tasks and completes all of them,
+        # returns number of completed tasks
+        started = time.time()
+        tasks = core.produce_tasks(self.world, self.actions, n,
+                                   self.readiness,
+                                   actions_counter=self.actions_counter)
+        produced = time.time()
+
+        ops = [task.action.do_action(task.items, task.id) for task in tasks]
+
+        acted = time.time()
+        self.world.apply_batch(ops)
+        self.scheduling_time += (produced - started) + (time.time() - acted)
+        self.completed += len(tasks)
+        return len(tasks)
+
+    def get_latency(self):
+        # returns seconds of scheduling per completed task
+        return self.scheduling_time / max(1, self.completed)
+
+    def run(self, n_tasks):
+        # returns number of tasks completed per second
+        done = 0
+        start = time.time()
+        while done < n_tasks:
+            completed = self.tick(CONCURRENCY)
+            if not completed:
+                break
+            done += completed
+        return done / (time.time() - start)
+
+
+class SchedulerSuite(object):
+    params = [[1000, 10000, 100000, 1000000], [10, 100, 500]]
+    param_names = ['items', 'actions']
+    timeout = 600
+
+    def setup(self, n_items, n_actions):
+        self.scheduler = Scheduler(n_items, n_actions)
+
+    def track_tasks_per_second(self, n_items, n_actions):
+        return self.scheduler.run(TASKS)
+    track_tasks_per_second.unit = 'tasks/s'
+
+    def track_scheduling_latency(self, n_items, n_actions):
+        self.scheduler.run(TASKS)
+        return self.scheduler.get_latency() * 1e6
+    track_scheduling_latency.unit = 'us'
+
+    def time_tick(self, n_items, n_actions):
+        # latency of one tick of CONCURRENCY tasks
+        self.scheduler.tick(CONCURRENCY)
+
+    def time_filter_items(self, n_items, n_actions):
+        for _ in self.scheduler.world.filter_items(['type_0_0']):
+            pass
+
+    def peakmem_world(self, n_items, n_actions):
+        # the body is empty: asv reports peak memory of the process after
+        # setup, i.e. of the world, actions and indexes only
+        pass
+
+
+def measure(n_items, n_actions):
+    # returns the scheduler and number of bytes allocated by it;
+    # tracing is stopped before the run, so it does not skew throughput
+    gc.collect()
+    tracemalloc.start()
+    scheduler = Scheduler(n_items, n_actions)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return scheduler, allocated
+
+
+def main():
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [
+        1000, 10000, 100000, 1000000]
+    registries = [int(sys.argv[2])] if len(sys.argv) > 2 else [10, 100, 500]
+
+    print('%10s %8s %12s %14s %12s' % (
+        'items', 'actions', 'tasks/s', 'latency/task', 'memory'))
+
+    for n_items in sizes:
+        for n_actions in registries:
+            scheduler, allocated = measure(n_items, n_actions)
+            rate = scheduler.run(TASKS)
+            print('%10d %8d %12.0f %12.1fus %10.1fMB' % (
+                n_items, n_actions, rate, scheduler.get_latency() * 1e6,
+                allocated / 1024.0 / 1024.0))
+            del scheduler
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Size and speed of task and operation encoding.
+
+Run with asv or directly: python -m benchmarks.serialization
+"""
+
+import timeit
+
+from act.engine import item as item_pkg
+from act.engine import operations
+from act.engine import serialization
+
+
+def make_task_message():
+    return ('5f0c8a8e-2b1c-4c8e-9a7d-1234567890ab', 'CreatePort',
+            [(10, 'meta_port', {}),
+             (20, 'network', dict(name='net-20', id='%032x' % 20)),
+             (30, 'subnet', dict(name='subnet-30', id='%032x' % 30))])
+
+
+def make_operation():
+    port = item_pkg.Item('port', dict(name='port', id='%032x' % 40),
+                         use_limit=10)
+    return operations.CreateOperation(
+        item=port, dependencies=[10, 20, 30],
+        task_id='5f0c8a8e-2b1c-4c8e-9a7d-1234567890ab')
+
+
+class SerializationSuite(object):
+    params = sorted(serialization.SERIALIZERS)
+    param_names = ['serializer']
+
+    def setup(self, name):
+        self.serializer = serialization.get_serializer(name)
+        self.message = make_task_message()
+        self.operation = make_operation()
+        self.task_data = self.serializer.dump_task(self.message)
+        self.operation_data = self.serializer.dump_operation(self.operation)
+
+    def time_dump_task(self, name):
+        self.serializer.dump_task(self.message)
+
+    def time_load_task(self, name):
+        self.serializer.load_task(self.task_data)
+
+    def time_dump_operation(self, name):
+        self.serializer.dump_operation(self.operation)
+
+    def time_load_operation(self, name):
+        self.serializer.load_operation(self.operation_data)
+
+    def track_task_bytes(self, name):
+        return len(self.task_data)
+    track_task_bytes.unit = 'bytes'
+
+    def track_operation_bytes(self, name):
+        return len(self.operation_data)
+    track_operation_bytes.unit = 'bytes'
+
+
+def main():
+    number = 100000
+    suite = SerializationSuite()
+    methods = ['time_dump_task', 'time_load_task',
+               'time_dump_operation', 'time_load_operation']
+
+    print('%-10s %8s %8s %12s %12s %12s %12s' % (
+        'serializer', 'task B', 'op B', 'dump task', 'load task',
+        'dump op', 'load op'))
+
+    for name in SerializationSuite.params:
+        suite.setup(name)
+        timings = []
+        for method in methods:
+            fn = getattr(suite, method)
+            total = timeit.timeit(lambda: fn(name), number=number)
+            timings.append(total / number * 1e6)
+
+        print('%-10s %8d %8d %10.2fus %10.2fus %10.2fus %10.2fus' % tuple(
+            [name, suite.track_task_bytes(name),
+             suite.track_operation_bytes(name)] + timings))
+
+
+if __name__ == '__main__':
+    main()